@@ -1,10 +1,11 @@
 import json
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import List, Tuple, Union
 
 from openai import AzureOpenAI, OpenAI
 
-from prompts import JUDGE_PROMPT
+from prompts import JUDGE_RENDER
 
 
 @dataclass
@@ -28,9 +29,11 @@ class Judge:
         self,
         llm_client: Union[OpenAI, AzureOpenAI],
         model_name: str,
+        max_workers: int = 8,
     ):
         self.llm_client = llm_client
         self.model_name = model_name
+        self.max_workers = max_workers
 
     def evaluate(
         self,
@@ -49,8 +52,17 @@ class Judge:
 
         conversation_text = self._format_conversation(conversation)
 
-        for idx, sp in enumerate(scoring_points):
-            is_hit, reason = self._judge_single(task_description, conversation_text, sp)
+        # Scoring points are judged independently, so issue the LLM calls
+        # concurrently and report them in their original order.
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(scoring_points)))) as pool:
+            judgments = list(
+                pool.map(
+                    lambda sp: self._judge_single(task_description, conversation_text, sp),
+                    scoring_points,
+                ),
+            )
+
+        for idx, (sp, (is_hit, reason)) in enumerate(zip(scoring_points, judgments)):
             result = JudgmentResult(
                 score_point=sp.score_point,
                 weight=sp.weight,
@@ -122,7 +134,7 @@ class Judge:
         )
 
         messages = [
-            {"role": "system", "content": JUDGE_PROMPT},
+            {"role": "system", "content": JUDGE_RENDER()},
             {"role": "user", "content": user_content},
         ]
 
@@ -1,3 +1,35 @@
+from string import Formatter
+from typing import Callable, List
+
+
+def _compile(template: str) -> Callable[..., str]:
+    """Parse a ``str.format`` template once and return a renderer for it.
+
+    The static segments (with ``{{``/``}}`` already unescaped) and field names
+    are resolved at import time, so rendering is a single join per call.
+    Templates with a field that is not a plain name, or that uses a conversion
+    or format spec, are rendered with ``str.format`` instead.
+    """
+    segments: List[str] = [""]
+    names: List[str] = []
+    for literal, field, format_spec, conversion in Formatter().parse(template):
+        if format_spec or conversion or (field is not None and not field.isidentifier()):
+            return template.format
+        segments[-1] += literal
+        if field is not None:
+            names.append(field)
+            segments.append("")
+
+    def render(**kwargs: str) -> str:
+        parts = [segments[0]]
+        for name, segment in zip(names, segments[1:]):
+            parts.append(str(kwargs[name]))
+            parts.append(segment)
+        return "".join(parts)
+
+    return render
+
+
 NEEDS_RESPONSE_PROMPT = """\
 You are analyzing an AI agent's response to determine if it is explicitly asking \
 the user a question or requesting additional information before it can proceed.
@@ -86,3 +118,8 @@ completed, or 'none' if all steps are done",
 
 Reply ONLY with the JSON object. No other text.\
 """
+
+NEEDS_RESPONSE_RENDER = _compile(NEEDS_RESPONSE_PROMPT)
+TESTER_FOLLOW_UP_RENDER = _compile(TESTER_FOLLOW_UP_PROMPT)
+JUDGE_RENDER = _compile(JUDGE_PROMPT)
+TASK_COMPLETION_CHECK_RENDER = _compile(TASK_COMPLETION_CHECK_PROMPT)
@@ -8,7 +8,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
 from openai import AzureOpenAI, OpenAI
 
-from prompts import NEEDS_RESPONSE_PROMPT, TASK_COMPLETION_CHECK_PROMPT, TESTER_FOLLOW_UP_PROMPT
+from prompts import NEEDS_RESPONSE_RENDER, TASK_COMPLETION_CHECK_RENDER, TESTER_FOLLOW_UP_RENDER
 
 from taskweaver.app.app import TaskWeaverApp
 from taskweaver.llm import LLMApi
@@ -199,7 +199,7 @@ class Tester:
     def _is_task_complete(self, agent_response: str, posts: list) -> bool:
         """Use LLM to check whether ALL parts of the task were completed."""
         all_posts_text = self._format_full_conversation_posts()
-        system_prompt = TASK_COMPLETION_CHECK_PROMPT.format(
+        system_prompt = TASK_COMPLETION_CHECK_RENDER(
             task_description=self.task_description,
             agent_response=agent_response,
             agent_posts=all_posts_text,
@@ -263,7 +263,7 @@ class Tester:
     def _agent_needs_response(self, agent_response: str) -> bool:
         """Use LLM to determine if the agent is asking a follow-up question.
         Fallback for non-planner scenarios."""
-        system_prompt = NEEDS_RESPONSE_PROMPT.format(
+        system_prompt = NEEDS_RESPONSE_RENDER(
             task_description=self.task_description,
         )
         messages = [
@@ -287,7 +287,7 @@ class Tester:
 
     def _generate_follow_up(self, agent_response: str) -> str:
         """Use LLM to generate a follow-up answer based on task_description context."""
-        system_prompt = TESTER_FOLLOW_UP_PROMPT.format(
+        system_prompt = TESTER_FOLLOW_UP_RENDER(
             task_description=self.task_description,
         )
 
@@ -320,6 +320,13 @@ if __name__ == "__main__":
         type=str,
         default="",
     )
+    parser.add_argument(
+        "-i",
+        "--index_type",
+        help="the FAISS index factory string, e.g., IVF4096,PQ32x8 for large collections",
+        type=str,
+        default="Flat",
+    )
     parser.add_argument(
         "-e",
         "--extensions",
@@ -339,10 +346,16 @@ if __name__ == "__main__":
     print(f"Encoding {len(texts)} chunks with SentenceTransformer...")
     model = SentenceTransformer("all-MiniLM-L6-v2")
     vectors = model.encode(texts, show_progress_bar=True, convert_to_numpy=True)
-    vectors = np.array(vectors, dtype=np.float32)
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    # unit-norm vectors make inner product equal to cosine similarity
+    faiss.normalize_L2(vectors)
 
     dim = vectors.shape[1]
-    index = faiss.IndexFlatL2(dim)
+    index = faiss.index_factory(dim, args.index_type, faiss.METRIC_INNER_PRODUCT)
+    if not index.is_trained:
+        # IVF/PQ indexes learn their centroids and codebooks from the corpus
+        print(f"Training {args.index_type} index...")
+        index.train(vectors)
     index.add(vectors)
 
     os.makedirs(args.output_path, exist_ok=True)
@@ -355,4 +368,24 @@ if __name__ == "__main__":
 
     with open(os.path.join(args.output_path, "chunk_id_to_index.pkl"), "wb") as f:
         pickle.dump(chunk_id_to_index, f)
+
+    # Also save the docstore as an Arrow file which the retriever memory-maps
+    arrow_path = os.path.join(args.output_path, "docstore.arrow")
+    try:
+        import pyarrow as pa
+
+        table = pa.Table.from_pylist(docstore)
+        # written next to the target and moved into place, so a running
+        # retriever that has the previous file mapped keeps reading it intact
+        with pa.OSFile(f"{arrow_path}.tmp", "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(f"{arrow_path}.tmp", arrow_path)
+    except ImportError:
+        print("pyarrow is not installed, skip saving docstore.arrow")
+        # the retriever prefers docstore.arrow, so one from a previous run
+        # would no longer match the new index
+        if os.path.exists(arrow_path):
+            os.remove(arrow_path)
+            print(f"Removed the outdated {arrow_path}")
     print(f"Saved index ({len(texts)} vectors, dim={dim}) to {args.output_path}")
@@ -7,10 +7,13 @@ import json
 import logging
 import mimetypes
 import os
+import tempfile
 from typing import Any, AsyncGenerator, Dict, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse, StreamingResponse
+from starlette.requests import ClientDisconnect
 
 from taskweaver.ces.server.models import (
     ArtifactModel,
@@ -511,6 +514,53 @@ async def upload_file(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.put(
+    "/sessions/{session_id}/files/{filename}",
+    response_model=UploadFileResponse,
+    dependencies=[Depends(verify_api_key)],
+)
+async def upload_file_raw(
+    session_id: str,
+    filename: str,
+    request: Request,
+    session_manager: ServerSessionManager = Depends(get_session_manager),
+) -> UploadFileResponse:
+    """Upload a file by streaming the raw request body to disk.
+
+    Unlike the JSON endpoint, the content is neither base64-encoded nor
+    buffered in memory, so large files are written chunk by chunk. The body
+    goes to a temporary file that replaces the target only once complete.
+    """
+    if not session_manager.session_exists(session_id):
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+
+    tmp_path: Optional[str] = None
+    try:
+        file_path = session_manager.get_upload_path(session_id, filename)
+        fd, tmp_path = tempfile.mkstemp(prefix=".upload-", dir=os.path.dirname(file_path))
+        # file writes run in the thread pool to keep the event loop responsive
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in request.stream():
+                await run_in_threadpool(f.write, chunk)
+        await run_in_threadpool(os.replace, tmp_path, file_path)
+        tmp_path = None
+        logger.info(f"Uploaded file {os.path.basename(file_path)} to session {session_id}")
+        return UploadFileResponse(
+            filename=filename,
+            status="uploaded",
+            path=file_path,
+        )
+    except ClientDisconnect:
+        logger.warning(f"Client disconnected while uploading file {filename} to session {session_id}")
+        raise HTTPException(status_code=400, detail="Client disconnected before the upload completed")
+    except Exception as e:
+        logger.error(f"Failed to upload file {filename} to session {session_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
 # =============================================================================
 # Artifacts
 # =============================================================================
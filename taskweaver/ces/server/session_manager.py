@@ -363,6 +363,27 @@ class ServerSessionManager:
 
         return None
 
+    def get_upload_path(self, session_id: str, filename: str) -> str:
+        """Resolve the path an uploaded file should be written to.
+
+        Args:
+            session_id: Session identifier.
+            filename: Target filename.
+
+        Returns:
+            Full path inside the session's working directory.
+
+        Raises:
+            KeyError: If session does not exist.
+        """
+        session = self.get_session(session_id)
+        if session is None:
+            raise KeyError(f"Session {session_id} not found")
+
+        # Sanitize filename to prevent path traversal
+        session.update_activity()
+        return os.path.join(session.cwd, os.path.basename(filename))
+
     def upload_file(
         self,
         session_id: str,
@@ -382,19 +403,12 @@ class ServerSessionManager:
         Raises:
             KeyError: If session does not exist.
         """
-        session = self.get_session(session_id)
-        if session is None:
-            raise KeyError(f"Session {session_id} not found")
-
-        # Sanitize filename to prevent path traversal
-        safe_filename = os.path.basename(filename)
-        file_path = os.path.join(session.cwd, safe_filename)
+        file_path = self.get_upload_path(session_id, filename)
 
         with open(file_path, "wb") as f:
             f.write(content)
 
-        session.update_activity()
-        logger.info(f"Uploaded file {safe_filename} to session {session_id}")
+        logger.info(f"Uploaded file {os.path.basename(file_path)} to session {session_id}")
         return file_path
 
     def cleanup_all(self) -> None:
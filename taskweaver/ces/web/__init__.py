@@ -4,27 +4,38 @@ from __future__ import annotations
 
 import logging
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 from fastapi import FastAPI, Request
 from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
+
+from taskweaver.web import CompressedStaticFiles
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
 def get_static_dir() -> Optional[Path]:
-    """Locate the built CES frontend static files directory."""
+    """Locate the built CES frontend static files directory.
+
+    The result is cached for the process; call ``get_static_dir.cache_clear()``
+    after building the frontend in a running process.
+    """
     current_dir = Path(__file__).parent
+    with os.scandir(current_dir) as it:
+        subdirs = {entry.name for entry in it if entry.is_dir()}
 
-    static_dir = current_dir / "static"
-    if static_dir.exists() and (static_dir / "index.html").exists():
-        return static_dir
+    if "static" in subdirs:
+        static_dir = current_dir / "static"
+        if os.path.isfile(static_dir / "index.html"):
+            return static_dir
 
-    frontend_dist = current_dir / "frontend" / "dist"
-    if frontend_dist.exists() and (frontend_dist / "index.html").exists():
-        return frontend_dist
+    if "frontend" in subdirs:
+        frontend_dist = current_dir / "frontend" / "dist"
+        if os.path.isfile(frontend_dist / "index.html"):
+            return frontend_dist
 
     return None
 
@@ -48,7 +59,7 @@ def mount_frontend(app: FastAPI, static_dir: Optional[Path] = None) -> bool:
 
     assets_dir = static_dir / "assets"
     if assets_dir.exists():
-        app.mount("/assets", StaticFiles(directory=str(assets_dir)), name="assets")
+        app.mount("/assets", CompressedStaticFiles(directory=str(assets_dir)), name="assets")
 
     @app.get("/")
     async def serve_index(request: Request):
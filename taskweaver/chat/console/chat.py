@@ -178,7 +178,8 @@ class TaskWeaverRoundUpdater(SessionEventHandlerBase, ConfirmationHandler):
                 self.pending_updates.append(("send_to_update", extra["role"]))
         elif type == PostEventType.post_message_update:
             with self.lock:
-                if self.last_attachment_id != "msg":
+                # starting the message again drops the text buffered so far
+                if self.last_attachment_id != "msg" or extra.get("reset", False):
                     self.pending_updates.append(("attachment_start", "msg"))
                     self.last_attachment_id = "msg"
                 self.pending_updates.append(("attachment_add", msg))
@@ -19,6 +19,7 @@ import os
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator, Optional
 
+import httpx
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -41,12 +42,52 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     if ces_url:
         chat_manager.set_server_url(ces_url)
 
+    # One long-lived client for all CES calls so connections are pooled
+    # and kept alive instead of re-handshaking on every proxied request.
+    pool_size: int = app.state.ces_pool_size
+    app.state.http_client = httpx.AsyncClient(
+        timeout=30.0,
+        limits=httpx.Limits(
+            max_keepalive_connections=pool_size,
+            max_connections=pool_size * 2,
+            keepalive_expiry=60.0,
+        ),
+    )
+
     logger.info(f"Chat server initialized with app_dir={app_dir}, ces_url={ces_url}")
 
     yield
 
     logger.info("Shutting down TaskWeaver Chat Server")
     chat_manager.cleanup_all()
+    await app.state.http_client.aclose()
+
+
+DEFAULT_CES_POOL_SIZE = 64
+
+
+def _resolve_ces_pool_size(ces_pool_size: Optional[int]) -> int:
+    """Return the CES pool size, falling back to TASKWEAVER_CES_POOL_SIZE or the default."""
+    if ces_pool_size is not None:
+        if ces_pool_size < 1:
+            raise ValueError(f"ces_pool_size must be at least 1, got {ces_pool_size}")
+        return ces_pool_size
+
+    env_value = os.getenv("TASKWEAVER_CES_POOL_SIZE")
+    if env_value is None:
+        return DEFAULT_CES_POOL_SIZE
+    try:
+        pool_size = int(env_value)
+    except ValueError:
+        pool_size = 0
+    if pool_size < 1:
+        # the default app is created at import time, so do not fail there
+        logger.warning(
+            f"Ignoring TASKWEAVER_CES_POOL_SIZE={env_value!r}: expected an integer of at least 1, "
+            f"using {DEFAULT_CES_POOL_SIZE}",
+        )
+        return DEFAULT_CES_POOL_SIZE
+    return pool_size
 
 
 def create_app(
@@ -54,6 +95,7 @@ def create_app(
     ces_url: Optional[str] = None,
     cors_origins: Optional[list[str]] = None,
     serve_frontend: bool = True,
+    ces_pool_size: Optional[int] = None,
 ) -> FastAPI:
     """Create and configure the chat/web FastAPI application.
 
@@ -62,6 +104,8 @@ def create_app(
         ces_url: URL of the CES (Code Execution Service) server.
         cors_origins: List of allowed CORS origins. Defaults to allowing all.
         serve_frontend: Whether to serve the frontend static files.
+        ces_pool_size: Number of keep-alive connections to the CES server.
+            Defaults to TASKWEAVER_CES_POOL_SIZE or 64; must be at least 1.
 
     Returns:
         Configured FastAPI application.
@@ -75,6 +119,7 @@ def create_app(
 
     app.state.app_dir = app_dir or os.getenv("TASKWEAVER_APP_DIR")
     app.state.ces_url = ces_url or os.getenv("TASKWEAVER_CES_URL")
+    app.state.ces_pool_size = _resolve_ces_pool_size(ces_pool_size)
 
     if cors_origins is None:
         cors_origins = ["*"]
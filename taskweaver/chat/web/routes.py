@@ -7,8 +7,9 @@ import threading
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import FileResponse, Response
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 
 from taskweaver.app.app import TaskWeaverApp
 from taskweaver.module.event_emitter import (
@@ -35,6 +36,10 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/chat", tags=["chat"])
 
+# Upstream response headers passed through when proxying artifacts from CES.
+# Length/encoding headers are left out as the body is re-streamed decoded.
+_FORWARDED_ARTIFACT_HEADERS = frozenset({"content-disposition", "etag", "last-modified"})
+
 
 @dataclass
 class ChatSession:
@@ -186,6 +191,7 @@ class WebSocketEventHandler(SessionEventHandlerBase):
                 "post_id": post_id,
                 "text": msg,
                 "is_end": extra.get("is_end", True),
+                "reset": extra.get("reset", False),
             })
         elif type == PostEventType.post_attachment_update:
             attachment_id = extra.get("id", "")
@@ -453,7 +459,7 @@ async def delete_chat_session(session_id: str):
 
 
 @router.get("/sessions/{session_id}/artifacts/{filename:path}")
-async def download_chat_artifact(session_id: str, filename: str):
+async def download_chat_artifact(request: Request, session_id: str, filename: str):
     """Serve artifacts from a chat session.
 
     Proxies the request to the CES server, which owns the artifact files.
@@ -470,21 +476,44 @@ async def download_chat_artifact(session_id: str, filename: str):
         import httpx
 
         ces_url = f"{server_url.rstrip('/')}/api/v1/sessions/{session_id}/artifacts/{filename}"
+        client: Optional[httpx.AsyncClient] = getattr(request.app.state, "http_client", None)
+        # The shared client is created by the app lifespan; an app built
+        # without it gets a client for this request only.
+        owned_client = httpx.AsyncClient(timeout=30.0) if client is None else None
+        client = client or owned_client
+
+        async def close_upstream(resp: Optional[httpx.Response] = None):
+            if resp is not None:
+                await resp.aclose()
+            if owned_client is not None:
+                await owned_client.aclose()
+
+        resp: Optional[httpx.Response] = None
         try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(ces_url, timeout=30.0)
+            # Issue a single streamed request: the body is forwarded chunk by
+            # chunk and the upstream connection is released once it is sent.
+            req = client.build_request("GET", ces_url, timeout=30.0)
+            resp = await client.send(req, stream=True)
             if resp.status_code == 200:
-                return Response(
-                    content=resp.content,
+                headers = {k: v for k, v in resp.headers.items() if k.lower() in _FORWARDED_ARTIFACT_HEADERS}
+                headers["Cache-Control"] = "public, max-age=3600"
+                return StreamingResponse(
+                    resp.aiter_bytes(),
                     media_type=resp.headers.get("content-type", "application/octet-stream"),
-                    headers={"Cache-Control": "public, max-age=3600"},
+                    headers=headers,
+                    background=BackgroundTask(close_upstream, resp),
                 )
-            elif resp.status_code == 404:
+            if resp.status_code == 404:
                 raise HTTPException(status_code=404, detail="Artifact not found")
             else:
                 raise HTTPException(status_code=resp.status_code, detail="CES server error")
         except httpx.ConnectError:
+            await close_upstream()
             logger.warning(f"Cannot reach CES server at {server_url}, trying local fallback")
+        except BaseException:
+            # the response is not handed over, so release the upstream connection here
+            await close_upstream(resp)
+            raise
 
     # Fallback: serve from local filesystem (works when CES runs as local subprocess)
     artifact_path = os.path.join(session.tw_session.execution_cwd, filename)
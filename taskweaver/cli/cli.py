@@ -1,11 +1,38 @@
+import os
+from typing import Dict, Optional, Tuple
+
 import click
 
+from taskweaver import __version__ as _tw_version
+
 from .chat import chat
 from .init import init
 from .server import server
 from .util import CliContext, get_ascii_banner
 
-_tw_version: str = __import__("taskweaver").__version__
+# Keep the imports above lightweight: heavy modules (the app, the servers, the
+# config machinery) are imported inside the command bodies that need them so
+# that `--help` and `--version` start fast.
+
+# Valid workspaces found by `discover_app_dir`, keyed on (project, cwd), so that
+# repeated invocations in one process do not walk the filesystem again. Invalid
+# or empty results are not cached as `init` may turn them into a workspace.
+_app_dir_cache: Dict[Tuple[Optional[str], str], Tuple[str, bool, bool]] = {}
+
+
+def _discover_app_dir(project: Optional[str]) -> Tuple[str, bool, bool]:
+    key = (project, os.getcwd())
+    if key in _app_dir_cache:
+        return _app_dir_cache[key]
+
+    from taskweaver.utils.app_utils import discover_app_dir
+
+    result = discover_app_dir(project)
+    if result[1]:
+        if len(_app_dir_cache) >= 8:
+            _app_dir_cache.pop(next(iter(_app_dir_cache)))
+        _app_dir_cache[key] = result
+    return result
 
 
 @click.group(
@@ -36,9 +63,7 @@ _tw_version: str = __import__("taskweaver").__version__
     default=None,
 )
 def taskweaver(ctx: click.Context, project: str, server_url: str):
-    from taskweaver.utils.app_utils import discover_app_dir
-
-    workspace_base, is_valid, is_empty = discover_app_dir(project)
+    workspace_base, is_valid, is_empty = _discover_app_dir(project)
 
     ctx.obj = CliContext(
         workspace=workspace_base,
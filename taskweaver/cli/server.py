@@ -13,24 +13,70 @@ Usage:
 """
 
 import os
+from typing import TYPE_CHECKING
 
 import click
 
 from taskweaver.cli.util import CliContext, require_workspace
 
+if TYPE_CHECKING:
+    from concurrent.futures import Future
 
-def _check_ces_health(ces_url: str) -> bool:
-    """Check if the CES server is reachable and healthy."""
-    import urllib.request
-    import urllib.error
 
-    health_url = f"{ces_url.rstrip('/')}/api/v1/health"
+def _wait_for_ces(ces_url: str, timeout: float = 30.0, interval: float = 0.5) -> bool:
+    """Wait until the CES server is reachable and healthy.
+
+    Polls the health endpoint until it returns 200 or `timeout` seconds have
+    passed. One HTTP connection is reused across attempts so that retries do
+    not pay a new handshake each time.
+    """
+    import http.client
+    import time
+    import urllib.parse
+
+    parts = urllib.parse.urlsplit(ces_url)
+    conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    health_path = f"{parts.path.rstrip('/')}/api/v1/health"
+    deadline = time.monotonic() + timeout
+
+    conn = conn_cls(parts.hostname or "localhost", parts.port, timeout=5)
     try:
-        req = urllib.request.Request(health_url, method="GET")
-        with urllib.request.urlopen(req, timeout=5) as resp:
-            return resp.status == 200
-    except (urllib.error.URLError, OSError):
-        return False
+        while True:
+            try:
+                conn.request("GET", health_path)
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status == 200:
+                    return True
+            except (http.client.HTTPException, OSError):
+                # drop the broken socket, the next request reconnects
+                conn.close()
+            if time.monotonic() + interval > deadline:
+                return False
+            time.sleep(interval)
+    finally:
+        conn.close()
+
+
+def _start_ces_probe(ces_url: str) -> "Future[bool]":
+    """Run `_wait_for_ces` in a daemon thread and return a future of its result.
+
+    A daemon thread is used so that an early exit (e.g., a missing dependency)
+    does not wait for the probe to time out.
+    """
+    import threading
+    from concurrent.futures import Future
+
+    probe: "Future[bool]" = Future()
+
+    def run() -> None:
+        try:
+            probe.set_result(_wait_for_ces(ces_url))
+        except BaseException as e:
+            probe.set_exception(e)
+
+    threading.Thread(target=run, name="ces-health-probe", daemon=True).start()
+    return probe
 
 
 @click.command()
@@ -112,34 +158,14 @@ def server(
 
     os.environ["TASKWEAVER_APP_DIR"] = workspace
     os.environ["TASKWEAVER_CES_URL"] = effective_ces_url
+    # a value exported by the user takes precedence over the project config
+    os.environ.setdefault("TASKWEAVER_CES_POOL_SIZE", str(get_config("chat.server.ces_pool_size", 64)))
 
     # Check CES server connectivity before starting
     click.echo()
-    click.echo(f"Checking CES server at {effective_ces_url} ...")
-    ces_healthy = _check_ces_health(effective_ces_url)
-    if not ces_healthy:
-        click.secho(
-            f"Error: Cannot connect to CES server at {effective_ces_url}",
-            fg="red",
-        )
-        click.echo()
-        click.echo("Please start the CES server first:")
-        click.echo(f"  python -m taskweaver.ces.server --port {effective_ces_url.rsplit(':', 1)[-1]}")
-        raise SystemExit(1)
-    click.secho("CES server is healthy.", fg="green")
-
-    click.echo()
-    click.echo("=" * 60)
-    click.echo("  TaskWeaver Chat/Web Server")
-    click.echo("=" * 60)
-    click.echo(f"  Project:      {ctx_obj.workspace}")
-    click.echo(f"  Host:         {effective_host}")
-    click.echo(f"  Port:         {effective_port}")
-    click.echo(f"  Chat UI:      http://{effective_host}:{effective_port}/chat")
-    click.echo(f"  Sessions UI:  Served by CES at {effective_ces_url}/")
-    click.echo(f"  CES Server:   {effective_ces_url}")
-    click.echo("=" * 60)
-    click.echo()
+    click.echo(f"Waiting for CES server at {effective_ces_url} ...")
+    # probe in the background while the server dependencies are imported
+    ces_probe = _start_ces_probe(effective_ces_url)
 
     try:
         import uvicorn
@@ -176,6 +202,31 @@ def server(
             )
             raise SystemExit(1)
 
+    ces_healthy = ces_probe.result()
+    if not ces_healthy:
+        click.secho(
+            f"Error: Cannot connect to CES server at {effective_ces_url}",
+            fg="red",
+        )
+        click.echo()
+        click.echo("Please start the CES server first:")
+        click.echo(f"  python -m taskweaver.ces.server --port {effective_ces_url.rsplit(':', 1)[-1]}")
+        raise SystemExit(1)
+    click.secho("CES server is healthy.", fg="green")
+
+    click.echo()
+    click.echo("=" * 60)
+    click.echo("  TaskWeaver Chat/Web Server")
+    click.echo("=" * 60)
+    click.echo(f"  Project:      {ctx_obj.workspace}")
+    click.echo(f"  Host:         {effective_host}")
+    click.echo(f"  Port:         {effective_port}")
+    click.echo(f"  Chat UI:      http://{effective_host}:{effective_port}/chat")
+    click.echo(f"  Sessions UI:  Served by CES at {effective_ces_url}/")
+    click.echo(f"  CES Server:   {effective_ces_url}")
+    click.echo("=" * 60)
+    click.echo()
+
     uvicorn.run(
         "taskweaver.chat.web.app:app",
         host=effective_host,
@@ -183,4 +234,8 @@ def server(
         reload=reload,
         log_level=log_level,
         ws=ws_impl,
+        # uvicorn already prefers uvloop/httptools when installed ("auto"); the
+        # project config may pin an implementation instead
+        loop=get_config("chat.server.loop", "auto"),
+        http=get_config("chat.server.http", "auto"),
     )
@@ -370,8 +370,9 @@ class CodeGenerator(Role):
             compaction=compaction,
         )
 
-        self.tracing.set_span_attribute("prompt", json.dumps(prompt, indent=2))
-        prompt_size = self.tracing.count_tokens(json.dumps(prompt))
+        if self.tracing.is_recording_prompt():
+            self.tracing.set_span_attribute("prompt", json.dumps(prompt, indent=2))
+        prompt_size = self.tracing.count_prompt_tokens(prompt)
         self.tracing.set_span_attribute("prompt_size", prompt_size)
         self.tracing.add_prompt_size(
             size=prompt_size,
@@ -124,7 +124,7 @@ class CodeGeneratorCLIOnly(Role):
                 prompt_log_path,
             )
 
-        prompt_size = self.tracing.count_tokens(json.dumps(prompt))
+        prompt_size = self.tracing.count_prompt_tokens(prompt)
         self.tracing.set_span_attribute("prompt_size", prompt_size)
         self.tracing.add_prompt_size(
             size=prompt_size,
@@ -133,7 +133,8 @@ class CodeGeneratorCLIOnly(Role):
             },
         )
 
-        self.tracing.set_span_attribute("prompt", json.dumps(prompt, indent=2))
+        if self.tracing.is_recording_prompt():
+            self.tracing.set_span_attribute("prompt", json.dumps(prompt, indent=2))
         llm_response = self.llm_api.chat_completion(
             messages=prompt,
             response_format=None,
@@ -1,11 +1,12 @@
-import json
+import hashlib
 import os
-from typing import List, Optional
+from collections import OrderedDict
+from typing import Dict, List, Optional
 
 from injector import inject
 
 from taskweaver.llm import LLMApi, format_chat_message
-from taskweaver.llm.util import PromptTypeWithTools
+from taskweaver.llm.util import ChatMessageType, PromptTypeWithTools
 from taskweaver.logging import TelemetryLogger
 from taskweaver.memory import CompactedMessage, CompactorConfig, ContextCompactor, Memory, Post, Round
 from taskweaver.memory.attachment import AttachmentType
@@ -14,7 +15,7 @@ from taskweaver.module.event_emitter import PostEventProxy, SessionEventEmitter
 from taskweaver.module.tracing import Tracing, tracing_decorator
 from taskweaver.role import Role
 from taskweaver.role.role import RoleConfig
-from taskweaver.utils import read_yaml
+from taskweaver.utils import fast_json_dumps, read_yaml
 
 
 class CodeGeneratorPluginOnlyConfig(RoleConfig):
@@ -43,6 +44,14 @@ class CodeGeneratorPluginOnlyConfig(RoleConfig):
         self.compaction_retain_recent = self._get_int("compaction_retain_recent", 3)
         self.compaction_llm_alias = self._get_str("compaction_llm_alias", default="", required=False)
         self.llm_alias = self._get_str("llm_alias", default="", required=False)
+        # Emit `cache_control` breakpoints on the system message and the tool list
+        # for OpenAI-compatible gateways fronting Anthropic/Bedrock models.
+        # OpenAI itself caches the prompt prefix automatically.
+        self.prompt_cache_markers = self._get_bool("prompt_cache_markers", False)
+        # Reuse the LLM response when exactly the same prompt is seen again,
+        # e.g., when re-running a session or evaluation case.
+        self.response_cache_enabled = self._get_bool("response_cache_enabled", False)
+        self.response_cache_size = self._get_int("response_cache_size", 128)
 
 
 class CodeGeneratorPluginOnly(Role):
@@ -63,9 +72,22 @@ class CodeGeneratorPluginOnly(Role):
         self.role_name = self.config.role_name
 
         self.prompt_data = read_yaml(self.config.prompt_file_path)
-        self.plugin_pool = [p for p in plugin_registry.get_list() if p.plugin_only is True]
+        self.plugin_pool = plugin_registry.get_plugin_only_list()
         self.instruction_template = self.prompt_data["content"]
 
+        # The system instructions and tool schemas do not change during a
+        # session, so they are built (and tokenized) once instead of per turn.
+        self.system_instructions = self.instruction_template.format(
+            ROLE_NAME=self.role_name,
+        )
+        self.plugin_functions = [p.format_function_calling() for p in self.plugin_pool]
+        self.system_tokens = self.tracing.count_tokens(self.system_instructions)
+        self.tools_tokens = self.tracing.count_tokens(fast_json_dumps(self.plugin_functions))
+
+        self.response_cache: OrderedDict[str, ChatMessageType] = OrderedDict()
+        # token counts of the posts already seen, keyed by post id
+        self.post_tokens: Dict[str, int] = {}
+
         self.compactor: Optional[ContextCompactor] = None
         if self.config.prompt_compression:
             compactor_config = CompactorConfig(
@@ -113,20 +135,15 @@ class CodeGeneratorPluginOnly(Role):
 
         # obtain the user query from the last round
         prompt_with_tools = self._compose_prompt(
-            system_instructions=self.instruction_template.format(
-                ROLE_NAME=self.role_name,
-            ),
+            system_instructions=self.system_instructions,
             rounds=rounds,
-            plugin_pool=self.plugin_pool,
         )
         post_proxy.update_send_to("Planner")
 
         if prompt_log_path is not None:
             self.logger.dump_prompt_file(prompt_with_tools, prompt_log_path)
 
-        prompt_size = self.tracing.count_tokens(
-            json.dumps(prompt_with_tools["prompt"]),
-        ) + self.tracing.count_tokens(json.dumps(prompt_with_tools["tools"]))
+        prompt_size = self.system_tokens + self.tools_tokens + self._count_rounds_tokens(rounds)
         self.tracing.set_span_attribute("prompt_size", prompt_size)
         self.tracing.add_prompt_size(
             size=prompt_size,
@@ -135,19 +152,25 @@ class CodeGeneratorPluginOnly(Role):
             },
         )
 
-        self.tracing.set_span_attribute(
-            "prompt",
-            json.dumps(prompt_with_tools["prompt"], indent=2),
-        )
+        if self.tracing.is_recording_prompt():
+            self.tracing.set_span_attribute(
+                "prompt",
+                fast_json_dumps(prompt_with_tools["prompt"], pretty=True),
+            )
 
-        llm_response = self.llm_api.chat_completion(
-            messages=prompt_with_tools["prompt"],
-            tools=prompt_with_tools["tools"],
-            tool_choice="auto",
-            response_format=None,
-            stream=False,
-            llm_alias=self.config.llm_alias,
-        )
+        cache_key = self._get_response_cache_key(prompt_with_tools) if self.config.response_cache_enabled else None
+        if cache_key is not None and cache_key in self.response_cache:
+            self.response_cache.move_to_end(cache_key)
+            llm_response = dict(self.response_cache[cache_key])
+            self.tracing.set_span_attribute("response_cache_hit", True)
+            if llm_response["role"] == "assistant":
+                post_proxy.update_message(llm_response["content"], is_end=False)
+        else:
+            llm_response = self._stream_llm_response(prompt_with_tools, post_proxy)
+            if cache_key is not None:
+                self.response_cache[cache_key] = dict(llm_response)
+                while len(self.response_cache) > self.config.response_cache_size:
+                    self.response_cache.popitem(last=False)
 
         output_size = self.tracing.count_tokens(llm_response["content"])
         self.tracing.set_span_attribute("output_size", output_size)
@@ -159,7 +182,7 @@ class CodeGeneratorPluginOnly(Role):
         )
 
         if llm_response["role"] == "assistant":
-            post_proxy.update_message(llm_response["content"])
+            post_proxy.update_message("", is_end=True)
             return post_proxy.end()
         elif llm_response["role"] == "function":
             post_proxy.update_attachment(
@@ -176,24 +199,90 @@ class CodeGeneratorPluginOnly(Role):
             )
             raise ValueError(f"Unexpected response from LLM: {llm_response}")
 
+    def _stream_llm_response(
+        self,
+        prompt_with_tools: PromptTypeWithTools,
+        post_proxy: PostEventProxy,
+    ) -> ChatMessageType:
+        """Stream the completion, forwarding the assistant text to the post as it arrives.
+
+        If the LLM decides to call functions, the returned message has the `function`
+        role and carries the calls; any text streamed before them is reset on the post, and
+        for the event consumers, so that only the execution output is sent back to the Planner.
+        """
+        llm_response = format_chat_message("assistant", "")
+        for chunk in self.llm_api.chat_completion_stream(
+            messages=prompt_with_tools["prompt"],
+            tools=prompt_with_tools["tools"],
+            tool_choice="auto",
+            response_format=None,
+            stream=True,
+            use_smoother=False,
+            llm_alias=self.config.llm_alias,
+        ):
+            if chunk["role"] == "function":
+                llm_response = format_chat_message("function", chunk["content"])
+                if post_proxy.post.message != "":
+                    post_proxy.reset_message()
+            elif chunk["content"] != "":
+                llm_response["content"] += chunk["content"]
+                post_proxy.update_message(chunk["content"], is_end=False)
+        return llm_response
+
+    def _is_prompt_post(self, post: Post) -> bool:
+        return (post.send_from == "Planner" and post.send_to == self.alias) or (
+            post.send_from == self.alias and post.send_to == "Planner"
+        )
+
+    def _count_rounds_tokens(self, rounds: List[Round]) -> int:
+        """Count the tokens of the conversation posts in the prompt.
+
+        Only posts not seen in previous turns are tokenized, so the cost per turn
+        does not grow with the length of the conversation.
+        """
+        posts = [post for _round in rounds for post in _round.post_list if self._is_prompt_post(post)]
+        new_posts = [post for post in posts if post.id not in self.post_tokens]
+        if len(new_posts) > 0:
+            counts = self.tracing.count_tokens_batch([post.message for post in new_posts])
+            self.post_tokens.update(zip([post.id for post in new_posts], counts))
+        return sum(self.post_tokens[post.id] for post in posts)
+
+    def _get_response_cache_key(self, prompt_with_tools: PromptTypeWithTools) -> str:
+        serialized = fast_json_dumps(
+            [self.config.llm_alias, prompt_with_tools],
+            sort_keys=True,
+        )
+        return hashlib.blake2b(serialized.encode("utf-8"), digest_size=16).hexdigest()
+
     def _compose_prompt(
         self,
         system_instructions: str,
         rounds: List[Round],
-        plugin_pool: List[PluginEntry],
+        plugin_pool: Optional[List[PluginEntry]] = None,
     ) -> PromptTypeWithTools:
-        functions = [plugin.format_function_calling() for plugin in plugin_pool]
-        prompt = [format_chat_message(role="system", message=system_instructions)]
-        for _round in rounds:
-            for post in _round.post_list:
-                if post.send_from == "Planner" and post.send_to == self.alias:
-                    prompt.append(
-                        format_chat_message(role="user", message=post.message),
-                    )
-                elif post.send_from == self.alias and post.send_to == "Planner":
-                    prompt.append(
-                        format_chat_message(role="assistant", message=post.message),
-                    )
+        if plugin_pool is None:
+            # copy so that the cache marker below does not leak into the cached list
+            functions = list(self.plugin_functions)
+        else:
+            functions = [plugin.format_function_calling() for plugin in plugin_pool]
+        if self.config.prompt_cache_markers and len(functions) > 0:
+            functions[-1] = {**functions[-1], "cache_control": {"type": "ephemeral"}}
+        prompt = [
+            format_chat_message(
+                role="system",
+                message=system_instructions,
+                cache_control=self.config.prompt_cache_markers,
+            ),
+        ]
+        prompt.extend(
+            format_chat_message(
+                role="user" if post.send_to == self.alias else "assistant",
+                message=post.message,
+            )
+            for _round in rounds
+            for post in _round.post_list
+            if self._is_prompt_post(post)
+        )
 
         return {
             "prompt": prompt,
@@ -67,12 +67,13 @@ class CodeInterpreterPluginOnly(Role, Interpreter):
             prompt_log_path=prompt_log_path,
         )
 
-        if post_proxy.post.message is not None and post_proxy.post.message != "":  # type: ignore
+        # the generator may stream some text before deciding to call functions,
+        # so the function attachment decides whether there is code to run
+        function_attachments = post_proxy.post.get_attachment(type=AttachmentType.function)
+        if len(function_attachments) == 0:
             return post_proxy.end()
 
-        functions = json.loads(
-            post_proxy.post.get_attachment(type=AttachmentType.function)[0].content,
-        )
+        functions = json.loads(function_attachments[0].content)
         if len(functions) > 0:
             code: List[str] = []
             function_names = []
@@ -1,7 +1,12 @@
 import json
 import os
 import pickle
-from typing import Any, Dict, List
+import queue
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import numpy as np
 from injector import inject
@@ -25,8 +30,325 @@ class DocumentRetrieverConfig(RoleConfig):
                 "knowledge_base",
             ),
         )
+        # folder with an ONNX export of the embedding model (model.onnx and
+        # tokenizer.json); if not set, SentenceTransformer is used
+        self.onnx_model_folder = self._get_str("onnx_model_folder", None, required=False)
         self.size = self._get_int("size", 5)
+        # number of inverted lists visited per query for IVF indexes
+        self.nprobe = self._get_int("nprobe", 16)
+        # OpenMP threads used by FAISS searches; 0 uses up to 8 cores
+        self.search_threads = self._get_int("search_threads", 0)
+        # seconds to wait for a search before giving up
+        self.search_timeout = self._get_float("search_timeout", 30)
         self.target_length = self._get_int("target_length", 256)
+        # number of recent queries whose results are kept; 0 disables the cache
+        self.query_cache_size = self._get_int("query_cache_size", 256)
+
+
+class _BatchedSearcher:
+    """Serve searches on a shared FAISS index from one worker thread.
+
+    Queries that arrive while a search is running are coalesced into a single
+    `index.search` call on the next round, so concurrent sessions share the
+    batched kernel instead of searching one row at a time. A lone query is
+    searched right away without waiting for others.
+    """
+
+    def __init__(self, index: Any, max_batch_size: int = 64):
+        self.index = index
+        self.max_batch_size = max_batch_size
+        self.queue: "queue.Queue[Optional[Tuple[np.ndarray, int, Future]]]" = queue.Queue()
+        # the worker holds no reference to the searcher, so the searcher of a
+        # reloaded index can be collected; the worker then stops on None
+        weakref.finalize(self, self.queue.put, None)
+        threading.Thread(
+            target=self._run,
+            args=(self.queue, index, max_batch_size),
+            name="faiss-searcher",
+            daemon=True,
+        ).start()
+
+    def search(
+        self,
+        query_vec: np.ndarray,
+        k: int,
+        timeout: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Search the index, raising TimeoutError if no result is ready within timeout seconds."""
+        future: Future = Future()
+        self.queue.put((np.ascontiguousarray(query_vec, dtype=np.float32), k, future))
+        return future.result(timeout=timeout)
+
+    @staticmethod
+    def _run(
+        requests: "queue.Queue[Optional[Tuple[np.ndarray, int, Future]]]",
+        index: Any,
+        max_batch_size: int,
+    ):
+        while True:
+            request = requests.get()
+            if request is None:
+                return
+            batch = [request]
+            while len(batch) < max_batch_size:
+                try:
+                    request = requests.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    break
+                batch.append(request)
+
+            # any failure is handed to the callers, so the worker keeps serving
+            try:
+                _BatchedSearcher._search_batch(index, batch)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+            if request is None:
+                return
+
+    @staticmethod
+    def _search_batch(index: Any, batch: List[Tuple[np.ndarray, int, Future]]):
+        # the top-k rows of a search with a larger k are the same as with k
+        k = max(item[1] for item in batch)
+        distances, indices = index.search(np.vstack([item[0] for item in batch]), k)
+
+        row = 0
+        for query_vec, query_k, future in batch:
+            n = query_vec.shape[0]
+            future.set_result((distances[row : row + n, :query_k], indices[row : row + n, :query_k]))
+            row += n
+
+
+class _ArrowDocstore(Sequence):
+    """Read-only docstore backed by a memory-mapped Arrow IPC file.
+
+    Entries are only materialized when accessed, and the mapped pages are
+    shared by all processes serving the same index through the page cache.
+    """
+
+    def __init__(self, path: str):
+        import pyarrow as pa
+
+        with pa.memory_map(path, "r") as source:
+            self.table = pa.ipc.open_file(source).read_all()
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def __getitem__(self, idx: int) -> Dict[str, Any]:
+        if idx < 0 or idx >= self.table.num_rows:
+            raise IndexError(idx)
+        return self.table.slice(idx, 1).to_pylist()[0]
+
+    def text(self, idx: int) -> str:
+        return self.table.column("text")[idx].as_py()
+
+    def text_batches(self, batch_size: int) -> Iterator[List[str]]:
+        for offset in range(0, self.table.num_rows, batch_size):
+            yield self.table.column("text").slice(offset, batch_size).to_pylist()
+
+    def chunk_keys(self) -> Iterator[Tuple[str, int]]:
+        metadata = self.table.column("metadata").combine_chunks()
+        return zip(metadata.field("source").to_pylist(), metadata.field("chunk_id").to_pylist())
+
+
+class _LoadedIndex:
+    """FAISS index of an index folder together with its docstore and chunk lookup.
+
+    One instance per index folder and search settings is shared by all sessions
+    of the process. It is reloaded as a whole once any of the index files changes
+    on disk, so a folder re-indexed while the server runs is never searched with
+    the docstore of another build.
+    """
+
+    INDEX_FILES = ("index.faiss", "index.pkl", "chunk_id_to_index.pkl", "docstore.arrow")
+
+    _instances: Dict[Tuple[str, int, int], "_LoadedIndex"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        searcher: _BatchedSearcher,
+        docstore: Sequence[Dict[str, Any]],
+        chunk_id_to_index: Dict[Tuple[str, int], int],
+        token_counts: np.ndarray,
+        file_stamp: Tuple[Optional[int], ...],
+    ):
+        self.searcher = searcher
+        self.docstore = docstore
+        self.chunk_id_to_index = chunk_id_to_index
+        # token count of each docstore entry, aligned with the docstore
+        self.token_counts = token_counts
+        self.file_stamp = file_stamp
+
+    @classmethod
+    def get(cls, index_folder: str, nprobe: int, num_threads: int, enc: Any) -> "_LoadedIndex":
+        key = (index_folder, nprobe, num_threads)
+        # taken before loading, so files changed while loading trigger another reload
+        file_stamp = cls.get_file_stamp(index_folder)
+        with cls._instances_lock:
+            loaded = cls._instances.get(key)
+            if loaded is None or loaded.file_stamp != file_stamp:
+                loaded = cls.load(index_folder, nprobe, num_threads, enc, file_stamp)
+                cls._instances[key] = loaded
+            return loaded
+
+    @classmethod
+    def get_file_stamp(cls, index_folder: str) -> Tuple[Optional[int], ...]:
+        """Modification times of the index files, None for the missing ones."""
+        stamps: List[Optional[int]] = []
+        for name in cls.INDEX_FILES:
+            try:
+                stamps.append(os.stat(os.path.join(index_folder, name)).st_mtime_ns)
+            except FileNotFoundError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    @classmethod
+    def load(
+        cls,
+        index_folder: str,
+        nprobe: int,
+        num_threads: int,
+        enc: Any,
+        file_stamp: Tuple[Optional[int], ...],
+    ) -> "_LoadedIndex":
+        import faiss
+
+        # a batch of queries is split across the OpenMP threads; the
+        # setting is process-wide, so it is applied when an index is loaded
+        faiss.omp_set_num_threads(num_threads if num_threads > 0 else min(os.cpu_count() or 1, 8))
+
+        index = faiss.read_index(os.path.join(index_folder, "index.faiss"))
+        try:
+            faiss.extract_index_ivf(index).nprobe = nprobe
+        except RuntimeError:
+            # not an IVF index, e.g., the default flat index
+            pass
+
+        docstore, chunk_id_to_index = cls._load_docstore(index_folder)
+        return cls(
+            _BatchedSearcher(index),
+            docstore,
+            chunk_id_to_index,
+            cls._count_docstore_tokens(docstore, enc),
+            file_stamp,
+        )
+
+    @staticmethod
+    def _load_docstore(
+        index_folder: str,
+    ) -> Tuple[Sequence[Dict[str, Any]], Dict[Tuple[str, int], int]]:
+        """Load the docstore and the chunk lookup.
+
+        The Arrow docstore is preferred when it was built and pyarrow is
+        installed; otherwise the pickled docstore is loaded into memory.
+        """
+        arrow_path = os.path.join(index_folder, "docstore.arrow")
+        try:
+            import pyarrow  # noqa: F401
+
+            use_arrow = os.path.exists(arrow_path)
+        except ImportError:
+            use_arrow = False
+
+        if use_arrow:
+            docstore = _ArrowDocstore(arrow_path)
+            # docstore positions are the chunk indexes
+            return docstore, {key: idx for idx, key in enumerate(docstore.chunk_keys())}
+
+        with open(
+            os.path.join(index_folder, "index.pkl"),
+            "rb",
+        ) as f:
+            pickled_docstore: List[Dict[str, Any]] = pickle.load(f)
+
+        with open(
+            os.path.join(
+                index_folder,
+                "chunk_id_to_index.pkl",
+            ),
+            "rb",
+        ) as f:
+            pickled_chunk_id_to_index: Dict[str, int] = pickle.load(f)
+
+        # keys are persisted as "{source}_{chunk_id}"; keep them as tuples so
+        # that do_expand does not format a string for every probe
+        chunk_id_to_index: Dict[Tuple[str, int], int] = {}
+        for key, idx in pickled_chunk_id_to_index.items():
+            source, chunk_id = key.rsplit("_", 1)
+            chunk_id_to_index[(source, int(chunk_id))] = idx
+        return pickled_docstore, chunk_id_to_index
+
+    @staticmethod
+    def _count_docstore_tokens(
+        docstore: Sequence[Dict[str, Any]],
+        enc: Any,
+        batch_size: int = 1024,
+    ) -> np.ndarray:
+        """Count the tokens of every docstore entry.
+
+        The texts are encoded batch by batch and only the counts are kept, so the
+        token ids of the whole corpus are never held in memory at once.
+        """
+        token_counts = np.zeros(len(docstore), dtype=np.int32)
+        if isinstance(docstore, _ArrowDocstore):
+            batches = docstore.text_batches(batch_size)
+        else:
+            batches = (
+                [entry["text"] for entry in docstore[offset : offset + batch_size]]
+                for offset in range(0, len(docstore), batch_size)
+            )
+        offset = 0
+        for texts in batches:
+            encoded = enc.encode_ordinary_batch(texts)
+            token_counts[offset : offset + len(encoded)] = [len(tokens) for tokens in encoded]
+            offset += len(encoded)
+        return token_counts
+
+
+class _OnnxEncoder:
+    """Encode sentences with an ONNX export of all-MiniLM-L6-v2.
+
+    The mean pooling and L2 normalization of the SentenceTransformer pipeline
+    are reproduced here, so the vectors can be searched against an index built
+    with SentenceTransformer. A dynamically quantized (int8) export runs
+    several times faster on CPU than the PyTorch model.
+    """
+
+    def __init__(self, model_folder: str, max_length: int = 256):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = os.cpu_count() or 1
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_folder, "model.onnx"),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_folder, "tokenizer.json"))
+        self.tokenizer.enable_padding()
+        self.tokenizer.enable_truncation(max_length=max_length)
+
+    def encode(self, sentences: List[str], **kwargs: Any) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(sentences)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+        mask = attention_mask[:, :, None].astype(np.float32)
+        embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return (embeddings / np.clip(norms, 1e-12, None)).astype(np.float32)
 
 
 class DocumentRetriever(Role):
@@ -41,40 +363,62 @@ class DocumentRetriever(Role):
     ):
         super().__init__(config, logger, tracing, event_emitter, role_entry)
         self.enc = None
-        self.chunk_id_to_index = None
+        self.loaded_index: Optional[_LoadedIndex] = None
+        self.chunk_id_to_index: Dict[Tuple[str, int], int] = {}
         self.index = None
-        self.docstore: List[Dict[str, Any]] = []
+        self.searcher: Optional[_BatchedSearcher] = None
+        self.docstore: Sequence[Dict[str, Any]] = []
+        # token count of each docstore entry, aligned with self.docstore; the
+        # token ids themselves are encoded on demand when a chunk is expanded
+        self.token_counts: np.ndarray = np.zeros(0, dtype=np.int32)
+        # expanded chunks of recent queries, keyed by the query text
+        self.query_cache: OrderedDict[str, List[Dict[str, Any]]] = OrderedDict()
         self.model = None
 
     def initialize(self):
-        import faiss
         import tiktoken
-        from sentence_transformers import SentenceTransformer
 
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
-        self.index = faiss.read_index(
-            os.path.join(self.config.index_folder, "index.faiss"),
-        )
-        with open(
-            os.path.join(self.config.index_folder, "index.pkl"),
-            "rb",
-        ) as f:
-            self.docstore = pickle.load(f)
+        if self.config.onnx_model_folder is not None:
+            self.model = _OnnxEncoder(self.config.onnx_model_folder)
+        else:
+            from sentence_transformers import SentenceTransformer
 
-        with open(
-            os.path.join(
-                self.config.index_folder,
-                "chunk_id_to_index.pkl",
-            ),
-            "rb",
-        ) as f:
-            self.chunk_id_to_index = pickle.load(f)
+            self.model = SentenceTransformer("all-MiniLM-L6-v2")
 
         self.enc = tiktoken.encoding_for_model("gpt-3.5-turbo")
+        self._load_index()
+
+    def _load_index(self):
+        """Use the shared index of the index folder, reloaded if its files changed."""
+        loaded = _LoadedIndex.get(
+            self.config.index_folder,
+            self.config.nprobe,
+            self.config.search_threads,
+            self.enc,
+        )
+        if loaded is self.loaded_index:
+            return
+
+        self.loaded_index = loaded
+        self.searcher = loaded.searcher
+        self.index = loaded.searcher.index
+        self.docstore = loaded.docstore
+        self.chunk_id_to_index = loaded.chunk_id_to_index
+        self.token_counts = loaded.token_counts
+        # results of the previous index may point to other chunks
+        self.query_cache.clear()
+
+    def _chunk_tokens(self, idx: int) -> List[int]:
+        if isinstance(self.docstore, _ArrowDocstore):
+            return self.enc.encode_ordinary(self.docstore.text(idx))
+        return self.enc.encode_ordinary(self.docstore[idx]["text"])
 
     def reply(self, memory: Memory, **kwargs: ...) -> Post:
         if not self.index:
             self.initialize()
+        else:
+            # picks up a folder that was re-indexed since the last query
+            self._load_index()
 
         rounds = memory.get_role_rounds(
             role=self.alias,
@@ -88,20 +432,15 @@ class DocumentRetriever(Role):
 
         post_proxy.update_send_to(last_post.send_from)
 
-        # Encode query and search
-        query_vec = self.model.encode([last_post.message], convert_to_numpy=True)
-        query_vec = np.array(query_vec, dtype=np.float32)
-        _, indices = self.index.search(query_vec, self.config.size)
-
-        # Build result list matching the old langchain format
-        result = []
-        for idx in indices[0]:
-            if idx < 0 or idx >= len(self.docstore):
-                continue
-            entry = self.docstore[idx]
-            result.append(entry)
-
-        expanded_chunks = self.do_expand(result, self.config.target_length)
+        if last_post.message in self.query_cache:
+            self.query_cache.move_to_end(last_post.message)
+            expanded_chunks = self.query_cache[last_post.message]
+        else:
+            expanded_chunks = self.search(last_post.message)
+            if self.config.query_cache_size > 0:
+                self.query_cache[last_post.message] = expanded_chunks
+                while len(self.query_cache) > self.config.query_cache_size:
+                    self.query_cache.popitem(last=False)
 
         post_proxy.update_message(
             f"DocumentRetriever has done searching for `{last_post.message}`.\n"
@@ -113,62 +452,91 @@ class DocumentRetriever(Role):
 
         return post_proxy.end()
 
+    def search(self, query: str) -> List[Dict[str, Any]]:
+        # Encode query and search; the query is normalized like the indexed
+        # vectors, which keeps the ranking of older L2 indexes unchanged
+        query_vec = self.model.encode([query], convert_to_numpy=True, normalize_embeddings=True)
+        query_vec = np.ascontiguousarray(query_vec, dtype=np.float32)
+        _, indices = self.searcher.search(query_vec, self.config.size, timeout=self.config.search_timeout)
+
+        # Build result list matching the old langchain format; FAISS pads
+        # missing neighbors with -1 when fewer than `size` vectors are found
+        row = indices[0]
+        valid = (row >= 0) & (row < len(self.docstore))
+        result = [self.docstore[idx] for idx in row[valid].tolist()]
+
+        return self.do_expand(result, self.config.target_length)
+
+    def _expand_window(
+        self,
+        source: str,
+        chunk_id: int,
+        current_length: int,
+        target_length: int,
+    ) -> Tuple[int, int, int, int]:
+        """Find the neighbors of a chunk to merge until target_length tokens.
+
+        Neighbors are added alternately from the left and the right, using the
+        token counts only. Returns the first and last chunk ids merged in full,
+        followed by the number of tokens to take from the left and the right
+        edge chunk that did not fit in full (at most one of them is non-zero).
+        """
+        left_id, right_id = chunk_id, chunk_id
+        while True:
+            left_idx = self.chunk_id_to_index.get((source, left_id - 1))
+            if left_idx is not None:
+                left_length = int(self.token_counts[left_idx])
+                if left_length + current_length < target_length:
+                    left_id -= 1
+                    current_length += left_length
+                else:
+                    return left_id, right_id, max(target_length - current_length, 0), 0
+
+            right_idx = self.chunk_id_to_index.get((source, right_id + 1))
+            if right_idx is not None:
+                right_length = int(self.token_counts[right_idx])
+                if right_length + current_length < target_length:
+                    right_id += 1
+                    current_length += right_length
+                else:
+                    return left_id, right_id, 0, max(target_length - current_length, 0)
+
+            if left_idx is None and right_idx is None:
+                return left_id, right_id, 0, 0
+
     def do_expand(self, result: List[Dict[str, Any]], target_length: int):
         expanded_chunks = []
         # do expansion
         for r in result:
             source = r["metadata"]["source"]
             chunk_id = r["metadata"]["chunk_id"]
-            content = r["text"]
-
-            expanded_result = content
-            left_chunk_id, right_chunk_id = chunk_id - 1, chunk_id + 1
-            left_valid, right_valid = True, True
-            chunk_ids = [chunk_id]
-            while True:
-                current_length = len(self.enc.encode(expanded_result))
-                if f"{source}_{left_chunk_id}" in self.chunk_id_to_index:
-                    chunk_ids.append(left_chunk_id)
-                    left_idx = self.chunk_id_to_index[f"{source}_{left_chunk_id}"]
-                    left_chunk = self.docstore[left_idx]
-                    encoded_left_chunk = self.enc.encode(left_chunk["text"])
-                    if len(encoded_left_chunk) + current_length < target_length:
-                        expanded_result = left_chunk["text"] + expanded_result
-                        left_chunk_id -= 1
-                        current_length += len(encoded_left_chunk)
-                    else:
-                        expanded_result += self.enc.decode(
-                            encoded_left_chunk[-(target_length - current_length) :],
-                        )
-                        current_length = target_length
-                        break
-                else:
-                    left_valid = False
-
-                if f"{source}_{right_chunk_id}" in self.chunk_id_to_index:
-                    chunk_ids.append(right_chunk_id)
-                    right_idx = self.chunk_id_to_index[f"{source}_{right_chunk_id}"]
-                    right_chunk = self.docstore[right_idx]
-                    encoded_right_chunk = self.enc.encode(right_chunk["text"])
-                    if len(encoded_right_chunk) + current_length < target_length:
-                        expanded_result += right_chunk["text"]
-                        right_chunk_id += 1
-                        current_length += len(encoded_right_chunk)
-                    else:
-                        expanded_result += self.enc.decode(
-                            encoded_right_chunk[: target_length - current_length],
-                        )
-                        current_length = target_length
-                        break
-                else:
-                    right_valid = False
 
-                if not left_valid and not right_valid:
-                    break
+            center_tokens = self.enc.encode_ordinary(r["text"])
+
+            left_id, right_id, left_trim, right_trim = self._expand_window(
+                source,
+                chunk_id,
+                len(center_tokens),
+                target_length,
+            )
+
+            # the token ids are concatenated and decoded once
+            tokens: List[int] = []
+            if left_trim > 0:
+                left_tokens = self._chunk_tokens(self.chunk_id_to_index[(source, left_id - 1)])
+                tokens.extend(left_tokens[len(left_tokens) - left_trim :])
+            for cid in range(left_id, right_id + 1):
+                if cid == chunk_id:
+                    tokens.extend(center_tokens)
+                else:
+                    tokens.extend(self._chunk_tokens(self.chunk_id_to_index[(source, cid)]))
+            if right_trim > 0:
+                right_tokens = self._chunk_tokens(self.chunk_id_to_index[(source, right_id + 1)])
+                tokens.extend(right_tokens[:right_trim])
 
             expanded_chunks.append(
                 {
-                    "chunk": expanded_result,
+                    "chunk": self.enc.decode(tokens),
                     "metadata": r["metadata"],
                 },
             )
@@ -115,6 +115,9 @@ class LLMApi(object):
             stop,
             **kwargs,
         ):
+            if msg_chunk["role"] == "function" and msg["role"] != "function":
+                # tool calls supersede any text streamed before them
+                msg["content"] = ""
             msg["role"] = msg_chunk["role"]
             msg["content"] += msg_chunk["content"]
             if "name" in msg_chunk:
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import os
 import sys
-from typing import TYPE_CHECKING, Any, Callable, Generator, List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Generator, List, Optional
 
 from injector import inject
 
@@ -236,6 +236,7 @@ class OpenAIService(CompletionService, EmbeddingService):
             )
             if stream:
                 role: Any = None
+                tool_calls: Dict[int, Dict[str, str]] = {}
                 for stream_res in res:
                     if not stream_res.choices:
                         continue
@@ -244,10 +245,31 @@ class OpenAIService(CompletionService, EmbeddingService):
                         continue
 
                     role = delta.role if delta.role is not None else role
+                    # tool calls arrive as fragments, collect them until the stream ends
+                    for t in delta.tool_calls or []:
+                        call = tool_calls.setdefault(t.index, {"name": "", "arguments": ""})
+                        if t.function is not None:
+                            call["name"] += t.function.name or ""
+                            call["arguments"] += t.function.arguments or ""
                     content = delta.content if delta.content is not None else ""
                     if content is None:
                         continue
                     yield format_chat_message(role, content)
+                if len(tool_calls) > 0:
+                    import json
+
+                    yield format_chat_message(
+                        "function",
+                        json.dumps(
+                            [
+                                {
+                                    "name": t["name"],
+                                    "arguments": json.loads(t["arguments"] or "{}"),
+                                }
+                                for _, t in sorted(tool_calls.items())
+                            ],
+                        ),
+                    )
             else:
                 oai_response = res.choices[0].message
                 if oai_response is None:
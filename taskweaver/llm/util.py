@@ -1,7 +1,7 @@
 from typing import Any, Dict, List, Literal, Optional, TypedDict, Union
 
 ChatMessageRoleType = Literal["system", "user", "assistant", "function"]
-ChatContentType = Dict[Literal["type", "text", "image_url"], str | Dict[Literal["url"], str]]
+ChatContentType = Dict[Literal["type", "text", "image_url", "cache_control"], str | Dict[Literal["url", "type"], str]]
 ChatMessageType = Dict[Literal["role", "name", "content"], str | List[ChatContentType]]
 
 PromptTypeSimple = List[ChatMessageType]
@@ -26,19 +26,24 @@ class PromptTypeWithTools(TypedDict):
 def format_chat_message_content(
     content_type: Literal["text", "image_url"],
     content_value: str,
+    cache_control: bool = False,
 ) -> ChatContentType:
     if content_type == "image_url":
-        return {
+        content: ChatContentType = {
             "type": content_type,
             content_type: {
                 "url": content_value,
             },
         }
     else:
-        return {
+        content: ChatContentType = {
             "type": content_type,
             content_type: content_value,
         }
+    if cache_control:
+        # prompt cache breakpoint understood by Anthropic-style endpoints
+        content["cache_control"] = {"type": "ephemeral"}
+    return content
 
 
 def format_chat_message(
@@ -46,8 +51,9 @@ def format_chat_message(
     message: str,
     image_urls: Optional[List[str]] = None,
     name: Optional[str] = None,
+    cache_control: bool = False,
 ) -> ChatMessageType:
-    if not image_urls:
+    if not image_urls and not cache_control:
         msg: ChatMessageType = {
             "role": role,
             "content": message,
@@ -56,9 +62,9 @@ def format_chat_message(
         msg: ChatMessageType = {
             "role": role,
             "content": [
-                format_chat_message_content("text", message),
+                format_chat_message_content("text", message, cache_control=cache_control),
             ]
-            + [format_chat_message_content("image_url", image) for image in image_urls],
+            + [format_chat_message_content("image_url", image) for image in image_urls or []],
         }
     if name is not None:
         msg["name"] = name
@@ -7,9 +7,11 @@ running in a background thread to avoid blocking user interaction.
 
 from __future__ import annotations
 
+import io
 import threading
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Callable, List, Optional, Protocol
+from string import Formatter
+from typing import TYPE_CHECKING, Callable, List, Optional, Protocol, Tuple
 
 from taskweaver.llm.util import ChatMessageType, format_chat_message
 from taskweaver.utils import read_yaml
@@ -75,6 +77,8 @@ class ContextCompactor:
     Design:
         - Single daemon thread processes compaction requests
         - notify_rounds_changed() is non-blocking, just signals the worker
+        - Worker blocks on that signal between runs, so it uses no CPU while idle;
+          notifications arriving during a compaction collapse into one more run
         - Worker thread checks if compaction is needed and performs it
         - No lock needed: worker writes complete immutable objects, main thread reads
 
@@ -101,8 +105,11 @@ class ContextCompactor:
         self._worker: Optional[threading.Thread] = None
         self._shutdown = threading.Event()
         self._work_available = threading.Event()
+        # set by the worker after each compaction attempt, successful or not
+        self._done_event = threading.Event()
 
         self._prompt_template = self._load_prompt_template()
+        self._prompt_parts = self._split_prompt_template(self._prompt_template)
 
     def _load_prompt_template(self) -> str:
         if not self.config.prompt_template_path:
@@ -114,6 +121,20 @@ class ContextCompactor:
         except Exception:
             return self._default_prompt_template()
 
+    @staticmethod
+    def _split_prompt_template(template: str) -> Optional[List[Tuple[str, Optional[str]]]]:
+        """Parse the template once into (literal, field name) pairs.
+
+        Escaped braces are already resolved in the literals. Returns None if a
+        field uses a conversion or format spec, in which case str.format is used.
+        """
+        parts: List[Tuple[str, Optional[str]]] = []
+        for literal, field, format_spec, conversion in Formatter().parse(template):
+            if format_spec or conversion:
+                return None
+            parts.append((literal, field))
+        return parts
+
     def _default_prompt_template(self) -> str:
         return """Summarize the following conversation history concisely.
 Focus on: key decisions made, important information exchanged, and current state.
@@ -165,7 +186,9 @@ Provide a clear, structured summary:"""
             if self._shutdown.is_set():
                 break
 
+            self._done_event.clear()
             self._try_compact()
+            self._done_event.set()
 
     def _try_compact(self) -> None:
         try:
@@ -206,18 +229,30 @@ Provide a clear, structured summary:"""
             previous_summary = prev_compacted.summary
             start_from = prev_compacted.end_index
 
-        content_parts: List[str] = []
+        # write into one buffer rather than keeping every line alive in a list
+        # until the final join
+        buffer = io.StringIO()
         for i in range(start_from, new_end):
             round_obj = rounds[i]
             round_num = i + 1
-            content_parts.append(f"\n--- Round {round_num} ---")
-            content_parts.append(f"User Query: {round_obj.user_query}")
+            if i > start_from:
+                buffer.write("\n")
+            buffer.write(f"\n--- Round {round_num} ---\nUser Query: {round_obj.user_query}")
 
             for post in round_obj.post_list:
-                msg_preview = post.message[:1024] + "..." if len(post.message) > 1024 else post.message
-                content_parts.append(f"  {post.send_from} -> {post.send_to}: {msg_preview}")
-
-        content = "\n".join(content_parts)
+                # write the pieces directly instead of formatting a line per post
+                buffer.write("\n  ")
+                buffer.write(post.send_from)
+                buffer.write(" -> ")
+                buffer.write(post.send_to)
+                buffer.write(": ")
+                if len(post.message) > 1024:
+                    buffer.write(post.message[:1024])
+                    buffer.write("...")
+                else:
+                    buffer.write(post.message)
+
+        content = buffer.getvalue()
 
         summary = self._call_llm_for_summary(content, previous_summary)
 
@@ -235,16 +270,24 @@ Provide a clear, structured summary:"""
         self.logger(f"ContextCompactor: Compaction complete (rounds 1-{new_end})")
 
     def _call_llm_for_summary(self, content: str, previous_summary: str) -> str:
-        prompt = self._prompt_template.format(content=content, PREVIOUS_SUMMARY=previous_summary)
+        values = {"content": content, "PREVIOUS_SUMMARY": previous_summary}
+        if self._prompt_parts is None:
+            prompt = self._prompt_template.format(**values)
+        else:
+            prompt = "".join(
+                literal + (values[field] if field is not None else "") for literal, field in self._prompt_parts
+            )
 
         messages: List[ChatMessageType] = [
             format_chat_message("system", "You are a helpful assistant that summarizes conversations."),
             format_chat_message("user", prompt),
         ]
 
+        # streamed so that long summaries do not sit on an idle connection
+        # until the whole completion is ready
         response = self.llm_api.chat_completion(
             messages=messages,
-            stream=False,
+            stream=True,
             temperature=0.3,
             llm_alias=self.llm_alias if self.llm_alias else None,
         )
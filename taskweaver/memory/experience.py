@@ -1,15 +1,23 @@
+import hashlib
 import json
 import os
+import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 from injector import inject
 
 from taskweaver.config.module_config import ModuleConfig
 from taskweaver.llm import LLMApi, format_chat_message
 from taskweaver.logging import TelemetryLogger
 from taskweaver.module.tracing import Tracing, tracing_decorator
-from taskweaver.utils import read_yaml, write_yaml
+from taskweaver.utils import fast_json_loads, read_yaml, write_yaml
+
+# quoted strings, used to pick the IDs out of a response that is not valid JSON
+_QUOTED_ID_RE = re.compile(r'["\']([^"\']+)["\']')
 
 
 @dataclass
@@ -69,6 +77,15 @@ class ExperienceConfig(ModuleConfig):
         )
 
         self.llm_alias = self._get_str("llm_alias", default="", required=False)
+        # number of selection results to remember; 0 disables the cache
+        self.selection_cache_size = self._get_int("selection_cache_size", 1024)
+
+        # "embedding" selects by the similarity between the query and the "when"
+        # sections, and only asks the LLM when no experience is similar enough
+        self.selection_method = self._get_enum("selection_method", ["llm", "embedding"], "llm")
+        self.embedding_model = self._get_str("embedding_model", "all-MiniLM-L6-v2")
+        self.embedding_threshold = self._get_float("embedding_threshold", 0.5)
+        self.embedding_top_k = self._get_int("embedding_top_k", 3)
 
 
 class ExperienceGenerator:
@@ -88,9 +105,27 @@ class ExperienceGenerator:
         self.selection_prompt_template = read_yaml(self.config.selection_prompt_path)["content"]
 
         self.experience_list: List[Experience] = []
+        self.experience_by_id: Dict[str, Experience] = {}
+        # candidates per role, in load order: experiences targeting the role
+        # plus those targeting all roles (which are also kept separately for
+        # roles no experience targets)
+        self.experiences_by_role: Dict[str, List[Experience]] = {}
+        self.all_role_experiences: List[Experience] = []
+        # selected experience ids keyed by a hash of the selection prompt
+        self.selection_cache: OrderedDict[str, Tuple[str, ...]] = OrderedDict()
+
+        # normalized embeddings of the "when" sections, one row per experience
+        self.when_encoder = None
+        self.when_embeddings = np.zeros((0, 0), dtype=np.float32)
+        self.when_rows: Dict[str, int] = {}
 
         self.experience_dir = None
         self.sub_path = None
+        # (directory, mtime) of the last listing, and the files found in it
+        self.exp_files_signature: Optional[Tuple[str, int]] = None
+        self.exp_files: List[str] = []
+        # directory and (file, mtime) pairs at the last load, to skip re-reading unchanged files
+        self.loaded_signature: Optional[Tuple[str, Tuple[Tuple[str, int], ...]]] = None
 
     def set_experience_dir(self, experience_dir: str):
         self.experience_dir = experience_dir
@@ -98,6 +133,11 @@ class ExperienceGenerator:
     def set_sub_path(self, sub_path: str):
         self.sub_path = sub_path
 
+    def invalidate_cache(self):
+        """Make the next load re-list and re-read the experience directory."""
+        self.exp_files_signature = None
+        self.loaded_signature = None
+
     @tracing_decorator
     def refresh(self):
         """Load handcrafted experiences from the experience directory."""
@@ -107,11 +147,7 @@ class ExperienceGenerator:
             self.logger.warning(f"Experience directory {exp_dir} does not exist. No experiences loaded.")
             return
 
-        handcrafted_exp_files = [
-            exp_file
-            for exp_file in os.listdir(exp_dir)
-            if exp_file.startswith("handcrafted_exp_") and exp_file.endswith(".yaml")
-        ]
+        handcrafted_exp_files = self._list_handcrafted_exp_files(exp_dir)
 
         if len(handcrafted_exp_files) == 0:
             self.logger.warning(
@@ -131,34 +167,115 @@ class ExperienceGenerator:
             self.logger.warning(f"Experience directory {exp_dir} does not exist.")
             return
 
-        handcrafted_exp_files = [
-            exp_file
-            for exp_file in os.listdir(exp_dir)
-            if exp_file.startswith("handcrafted_exp_") and exp_file.endswith(".yaml")
-        ]
+        handcrafted_exp_files = self._list_handcrafted_exp_files(exp_dir)
 
         if len(handcrafted_exp_files) == 0:
             self.logger.warning("No handcrafted experience files found.")
             return
 
-        loaded_ids = {exp.exp_id for exp in self.experience_list}
+        exp_paths = [os.path.join(exp_dir, exp_file) for exp_file in handcrafted_exp_files]
+        signature = (
+            exp_dir,
+            tuple((exp_file, os.stat(path).st_mtime_ns) for exp_file, path in zip(handcrafted_exp_files, exp_paths)),
+        )
+        if signature == self.loaded_signature:
+            return
+
+        # the files are independent, so read them concurrently
+        with ThreadPoolExecutor(max_workers=min(8, len(handcrafted_exp_files))) as executor:
+            experience_data_list = list(executor.map(read_yaml, exp_paths))
 
-        for exp_file in handcrafted_exp_files:
-            exp_file_path = os.path.join(exp_dir, exp_file)
-            experience_data = read_yaml(exp_file_path)
+        for exp_file, experience_data in zip(handcrafted_exp_files, experience_data_list):
             experience_obj = Experience.from_dict(experience_data)
 
-            if experience_obj.exp_id in loaded_ids:
+            if experience_obj.exp_id in self.experience_by_id:
                 continue
 
             self.experience_list.append(experience_obj)
-            loaded_ids.add(experience_obj.exp_id)
+            self.experience_by_id[experience_obj.exp_id] = experience_obj
+            self._index_experience_by_role(experience_obj)
             self.logger.info(
                 f"Loaded experience [{experience_obj.exp_id}] from {exp_file} "
                 f"targeting {experience_obj.who or 'all roles'}",
             )
 
         self.logger.info(f"Loaded {len(self.experience_list)} experience(s) in total.")
+        self.loaded_signature = signature
+
+        if self.config.selection_method == "embedding":
+            self._update_when_embeddings()
+
+    def _list_handcrafted_exp_files(self, exp_dir: str) -> List[str]:
+        """List the handcrafted experience files in a directory.
+
+        The last listing is reused while the directory mtime is unchanged, as
+        adding, removing or renaming a file updates it.
+        """
+        signature = (exp_dir, os.stat(exp_dir).st_mtime_ns)
+        if signature != self.exp_files_signature:
+            with os.scandir(exp_dir) as entries:
+                self.exp_files = sorted(
+                    entry.name
+                    for entry in entries
+                    if entry.name.startswith("handcrafted_exp_") and entry.name.endswith(".yaml")
+                )
+            self.exp_files_signature = signature
+        return self.exp_files
+
+    def _index_experience_by_role(self, exp: Experience):
+        if len(exp.who) == 0:
+            self.all_role_experiences.append(exp)
+            for role_experiences in self.experiences_by_role.values():
+                role_experiences.append(exp)
+            return
+
+        for role in dict.fromkeys(exp.who):
+            if role not in self.experiences_by_role:
+                self.experiences_by_role[role] = list(self.all_role_experiences)
+            self.experiences_by_role[role].append(exp)
+
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        if self.when_encoder is None:
+            from sentence_transformers import SentenceTransformer
+
+            self.when_encoder = SentenceTransformer(self.config.embedding_model)
+        return np.asarray(
+            self.when_encoder.encode(texts, convert_to_numpy=True, normalize_embeddings=True),
+            dtype=np.float32,
+        )
+
+    def _update_when_embeddings(self):
+        """Embed the "when" sections of experiences that are not embedded yet."""
+        new_exps = [exp for exp in self.experience_list if exp.exp_id not in self.when_rows]
+        if len(new_exps) == 0:
+            return
+
+        embeddings = self._encode_texts([exp.when for exp in new_exps])
+        for exp in new_exps:
+            self.when_rows[exp.exp_id] = len(self.when_rows)
+        if self.when_embeddings.size == 0:
+            self.when_embeddings = embeddings
+        else:
+            self.when_embeddings = np.vstack([self.when_embeddings, embeddings])
+
+    def _select_by_embedding(
+        self,
+        user_query: str,
+        candidates: List[Experience],
+    ) -> Optional[List[Experience]]:
+        """Select the candidates whose "when" section is similar to the query.
+
+        Returns None if even the most similar candidate is below the threshold,
+        in which case the selection is left to the LLM.
+        """
+        self._update_when_embeddings()
+
+        query_embedding = self._encode_texts([user_query])[0]
+        scores = self.when_embeddings[[self.when_rows[exp.exp_id] for exp in candidates]] @ query_embedding
+        ranked = np.argsort(-scores)[: self.config.embedding_top_k]
+        if scores[ranked[0]] < self.config.embedding_threshold:
+            return None
+        return [candidates[i] for i in ranked if scores[i] >= self.config.embedding_threshold]
 
     @tracing_decorator
     def retrieve_experience(
@@ -170,6 +287,10 @@ class ExperienceGenerator:
     ) -> List[Experience]:
         """Use LLM to select relevant experiences based on user query and conversation context.
 
+        With `experience.selection_method` set to "embedding", the experiences are
+        first ranked by the similarity of their "when" sections to the query, and
+        the LLM is only asked when none of them reaches the threshold.
+
         Args:
             user_query: The current user query
             role: Role alias to filter experiences by their "who" field.
@@ -183,10 +304,10 @@ class ExperienceGenerator:
         role_tag = f"[{role}] " if role else ""
 
         # Filter by role: include experiences that target this role or target all roles (empty who)
-        candidates = [
-            exp for exp in self.experience_list
-            if len(exp.who) == 0 or role is None or role in exp.who
-        ]
+        if role is None:
+            candidates = self.experience_list
+        else:
+            candidates = self.experiences_by_role.get(role, self.all_role_experiences)
         skipped = len(self.experience_list) - len(candidates)
         if skipped > 0:
             self.logger.info(
@@ -203,6 +324,17 @@ class ExperienceGenerator:
             f"[{', '.join(e.exp_id for e in candidates)}]",
         )
 
+        if self.config.selection_method == "embedding":
+            selected_experiences = self._select_by_embedding(user_query, candidates)
+            if selected_experiences is not None:
+                self.tracing.set_span_attribute("selection_method", "embedding")
+                self.logger.info(
+                    f"{role_tag}Selected {len(selected_experiences)}/{len(candidates)} experience(s) "
+                    f"by embedding similarity: [{', '.join(e.exp_id for e in selected_experiences)}]",
+                )
+                return selected_experiences
+            self.logger.info(f"{role_tag}No experience is similar enough to the query, falling back to LLM")
+
         if conversation_context:
             self.logger.debug(f"{role_tag}Conversation context for selection:\n{conversation_context}")
 
@@ -225,8 +357,22 @@ class ExperienceGenerator:
             format_chat_message("user", f"Select relevant experiences for: {user_query}"),
         ]
 
-        self.tracing.set_span_attribute("prompt", json.dumps(messages, indent=2))
-        prompt_size = self.tracing.count_tokens(json.dumps(messages))
+        # the prompt covers the query, the context and the candidates' "when"
+        # sections, so an identical prompt yields the same selection
+        cache_key = self._get_selection_cache_key(messages) if self.config.selection_cache_size > 0 else None
+        if cache_key is not None and cache_key in self.selection_cache:
+            self.selection_cache.move_to_end(cache_key)
+            self.tracing.set_span_attribute("selection_cache_hit", True)
+            selected_experiences = self._get_experiences_by_ids(list(self.selection_cache[cache_key]))
+            self.logger.info(
+                f"{role_tag}Selected {len(selected_experiences)}/{len(candidates)} experience(s) from cache: "
+                f"[{', '.join(e.exp_id for e in selected_experiences)}]",
+            )
+            return selected_experiences
+
+        if self.tracing.is_recording_prompt():
+            self.tracing.set_span_attribute("prompt", json.dumps(messages, indent=2))
+        prompt_size = self.tracing.count_prompt_tokens(messages)
         self.tracing.set_span_attribute("prompt_size", prompt_size)
         self.tracing.add_prompt_size(
             size=prompt_size,
@@ -254,6 +400,11 @@ class ExperienceGenerator:
         # Parse the response to extract experience IDs
         selected_experiences = self._parse_selected_experience_ids(selected_ids_text)
 
+        if cache_key is not None:
+            self.selection_cache[cache_key] = tuple(e.exp_id for e in selected_experiences)
+            while len(self.selection_cache) > self.config.selection_cache_size:
+                self.selection_cache.popitem(last=False)
+
         self.logger.info(
             f"{role_tag}Selected {len(selected_experiences)}/{len(candidates)} experience(s): "
             f"[{', '.join(e.exp_id for e in selected_experiences)}]",
@@ -270,7 +421,7 @@ class ExperienceGenerator:
         """
         try:
             # Try to parse as JSON
-            parsed = json.loads(llm_response)
+            parsed = fast_json_loads(llm_response)
             if isinstance(parsed, list):
                 selected_ids = parsed
             elif isinstance(parsed, dict):
@@ -282,20 +433,26 @@ class ExperienceGenerator:
         except json.JSONDecodeError:
             # Fallback: extract IDs from text
             self.logger.warning(f"Failed to parse LLM response as JSON, trying text extraction: {llm_response}")
-            import re
-            selected_ids = re.findall(r'["\']([^"\']+)["\']', llm_response)
+            selected_ids = _QUOTED_ID_RE.findall(llm_response)
 
-        # Match IDs to experiences
+        return self._get_experiences_by_ids(selected_ids)
+
+    def _get_experiences_by_ids(self, exp_ids: List[str]) -> List[Experience]:
+        """Match IDs to loaded experiences, keeping the order of the IDs."""
         selected_experiences = []
-        for exp_id in selected_ids:
-            matching_exps = [exp for exp in self.experience_list if exp.exp_id == exp_id]
-            if matching_exps:
-                selected_experiences.append(matching_exps[0])
+        for exp_id in exp_ids:
+            exp = self.experience_by_id.get(exp_id) if isinstance(exp_id, str) else None
+            if exp is not None:
+                selected_experiences.append(exp)
             else:
                 self.logger.warning(f"Experience ID {exp_id} not found in experience list.")
 
         return selected_experiences
 
+    def _get_selection_cache_key(self, messages: List[Any]) -> str:
+        serialized = json.dumps([self.config.llm_alias, messages], sort_keys=True)
+        return hashlib.blake2b(serialized.encode("utf-8"), digest_size=16).hexdigest()
+
     def _delete_exp_file(self, exp_file_name: str):
         exp_dir = self.get_experience_dir()
 
@@ -241,6 +241,20 @@ class PluginRegistry(ComponentRegistry[PluginEntry]):
         ttl: Optional[timedelta] = None,
     ) -> None:
         super().__init__(file_glob, ttl)
+        self._plugin_only_list: List[PluginEntry] = []
+        self._plugin_only_source: Optional[Dict[str, PluginEntry]] = None
+
+    def get_plugin_only_list(
+        self,
+        force_reload: bool = False,
+        freshness: Optional[timedelta] = None,
+    ) -> List[PluginEntry]:
+        """Get the `plugin_only` plugins, filtered once per registry load."""
+        registry = self.get_registry(force_reload, freshness, show_error=True)
+        if self._plugin_only_source is not registry:
+            self._plugin_only_list = [registry[k] for k in sorted(registry.keys()) if registry[k].plugin_only]
+            self._plugin_only_source = registry
+        return list(self._plugin_only_list)
 
     def _load_component(self, path: str) -> Tuple[str, PluginEntry]:
         entry: Optional[PluginEntry] = PluginEntry.from_yaml_file(path)
@@ -193,6 +193,16 @@ class PostEventProxy:
             {"is_end": is_end},
         )
 
+    def reset_message(self):
+        """Discard the message streamed so far, e.g. when the LLM turns to calling functions."""
+        assert not self.message_is_end, "Cannot reset message when update is finished"
+        self.post.message = ""
+        self._emit(
+            PostEventType.post_message_update,
+            "",
+            {"is_end": False, "reset": True},
+        )
+
     def update_attachment(
         self,
         message: str,
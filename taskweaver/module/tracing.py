@@ -1,12 +1,14 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, Callable, Dict, Literal, Optional, ParamSpec, TypeVar
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Literal, Optional, ParamSpec, TypeVar
 
 from injector import inject
 
 if TYPE_CHECKING:
     from opentelemetry.util import types
 
+    from taskweaver.llm.util import ChatMessageType
+
 from taskweaver.config.module_config import ModuleConfig
 
 
@@ -18,6 +20,7 @@ class TracingConfig(ModuleConfig):
         self.service_name = self._get_str("service_name", "taskweaver.otlp.tracer")
         self.exporter = self._get_str("exporter", "otlp")
         self.tokenizer_target_model = self._get_str("tokenizer_target_model", "gpt-4")
+        self.record_prompt = self._get_bool("record_prompt", True)
 
 
 _tracer = None
@@ -26,6 +29,7 @@ _StatusCode = None
 _meter = None
 _counters: Dict[str, Any] = {}
 _enc = None
+_record_prompt = False
 
 
 class Tracing:
@@ -34,7 +38,7 @@ class Tracing:
         self,
         config: TracingConfig,
     ):
-        global _tracer, _trace, _StatusCode, _meter, _enc, _counters
+        global _tracer, _trace, _StatusCode, _meter, _enc, _counters, _record_prompt
 
         self.config = config
         if not self.config.enabled:
@@ -107,6 +111,7 @@ class Tracing:
         )
         # To get the tokeniser corresponding to a specific model in the OpenAI API:
         _enc = tiktoken.encoding_for_model(self.config.tokenizer_target_model)
+        _record_prompt = self.config.record_prompt
 
     @staticmethod
     def set_span_status(
@@ -155,6 +160,40 @@ class Tracing:
 
         return len(_enc.encode(data))
 
+    @staticmethod
+    def count_tokens_batch(data: List[str]) -> List[int]:
+        if _enc is None:
+            return [0] * len(data)
+
+        # tiktoken encodes the batch on multiple threads
+        return [len(tokens) for tokens in _enc.encode_batch(data)]
+
+    @staticmethod
+    def count_prompt_tokens(messages: List[ChatMessageType]) -> int:
+        """Count the tokens of the message contents, ignoring the JSON scaffolding."""
+        if _enc is None:
+            return 0
+
+        size = 0
+        for message in messages:
+            content = message["content"]
+            if isinstance(content, str):
+                size += len(_enc.encode(content))
+            else:
+                for part in content:
+                    if part["type"] == "text":
+                        size += len(_enc.encode(part["text"]))
+        return size
+
+    @staticmethod
+    def is_recording_prompt() -> bool:
+        """Whether the full prompt should be attached to the current span.
+
+        Callers check this before serializing the prompt so that the
+        serialization cost is not paid when it would be dropped anyway.
+        """
+        return _trace is not None and _record_prompt
+
 
 class DummyTracer:
     def __enter__(self):
@@ -329,8 +329,9 @@ class Planner(Role):
                         except GeneratorExit:
                             pass
 
-            self.tracing.set_span_attribute("prompt", json.dumps(chat_history, indent=2))
-            prompt_size = self.tracing.count_tokens(json.dumps(chat_history))
+            if self.tracing.is_recording_prompt():
+                self.tracing.set_span_attribute("prompt", json.dumps(chat_history, indent=2))
+            prompt_size = self.tracing.count_prompt_tokens(chat_history)
             self.tracing.set_span_attribute("prompt_size", prompt_size)
             self.tracing.add_prompt_size(
                 size=prompt_size,
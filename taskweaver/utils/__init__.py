@@ -3,6 +3,11 @@ from __future__ import annotations
 import json
 from typing import Any, Dict, List, Union
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def create_id(length: int = 4) -> str:
     import secrets
@@ -16,9 +21,11 @@ def create_id(length: int = 4) -> str:
 def read_yaml(path: str) -> Dict[str, Any]:
     import yaml
 
+    # the libyaml-based loader is several times faster when PyYAML is built with it
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
     try:
         with open(path, "r") as file:
-            return yaml.safe_load(file)
+            return yaml.load(file, Loader=loader)
     except Exception as e:
         raise ValueError(f"Yaml loading failed due to: {e}")
 
@@ -80,6 +87,34 @@ def json_dump(obj: Any, fp: Any):
     json.dump(obj, fp, cls=EnhancedJSONEncoder)
 
 
+def fast_json_dumps(obj: Any, pretty: bool = False, sort_keys: bool = False) -> str:
+    """Serialize plain JSON data (e.g., prompts) with orjson if it is installed.
+
+    Falls back to the standard json module. The output is compact unless
+    `pretty` is set, in which case it is indented by 2 spaces.
+    """
+    if orjson is not None:
+        option = 0
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=option).decode("utf-8")
+    if pretty:
+        return json.dumps(obj, indent=2, sort_keys=sort_keys)
+    return json.dumps(obj, sort_keys=sort_keys, separators=(",", ":"))
+
+
+def fast_json_loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON with orjson if it is installed, else with the json module.
+
+    Both raise a `json.JSONDecodeError` on invalid input.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 def pretty_repr(val: Any, limit: int = 200) -> str:
     try:
         rendered = repr(val)
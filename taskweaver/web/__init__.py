@@ -2,30 +2,117 @@
 
 from __future__ import annotations
 
+import gzip
 import logging
 import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 from fastapi import FastAPI, Request
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import Scope
 
 logger = logging.getLogger(__name__)
 
+_COMPRESSIBLE_SUFFIXES = (".js", ".css", ".html", ".svg", ".json", ".map", ".txt")
 
+
+class CompressedStaticFiles(StaticFiles):
+    """StaticFiles for the hashed build assets, gzipped and cached long-term.
+
+    Vite names the built assets by content hash, so they are marked immutable.
+    Text assets are gzipped on first request and the result is kept in memory
+    until the file's size or mtime changes. At most `max_cache_bytes` of
+    gzipped bodies are kept, evicting the least recently served first.
+    """
+
+    cache_control = "public, max-age=31536000, immutable"
+
+    def __init__(self, *args, max_cache_bytes: int = 32 * 1024 * 1024, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_cache_bytes = max_cache_bytes
+        # full path -> ((size, mtime), gzipped body, etag)
+        self._gzipped: OrderedDict[str, Tuple[Tuple[int, int], bytes, str]] = OrderedDict()
+        self._gzipped_bytes = 0
+        self._gzipped_lock = threading.Lock()
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        if not isinstance(response, FileResponse) or response.status_code != 200:
+            return response
+
+        response.headers["cache-control"] = self.cache_control
+        if not path.endswith(_COMPRESSIBLE_SUFFIXES):
+            return response
+        response.headers["vary"] = "Accept-Encoding"
+        request_headers = Headers(scope=scope)
+        if scope["method"] == "HEAD" or "gzip" not in request_headers.get("accept-encoding", ""):
+            return response
+
+        body, etag = await run_in_threadpool(self._get_gzipped, str(response.path), response.stat_result)
+        headers = {
+            "cache-control": self.cache_control,
+            "vary": "Accept-Encoding",
+            "etag": etag,
+            "last-modified": response.headers["last-modified"],
+        }
+        if request_headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        headers["content-encoding"] = "gzip"
+        return Response(body, media_type=response.media_type, headers=headers)
+
+    def _get_gzipped(self, full_path: str, stat_result: os.stat_result) -> Tuple[bytes, str]:
+        version = (stat_result.st_size, stat_result.st_mtime_ns)
+        with self._gzipped_lock:
+            cached = self._gzipped.get(full_path)
+            if cached is not None and cached[0] == version:
+                self._gzipped.move_to_end(full_path)
+                return cached[1], cached[2]
+
+        with open(full_path, "rb") as f:
+            body = gzip.compress(f.read(), mtime=0)
+        etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}-gz"'
+
+        with self._gzipped_lock:
+            previous = self._gzipped.pop(full_path, None)
+            if previous is not None:
+                self._gzipped_bytes -= len(previous[1])
+            if len(body) <= self.max_cache_bytes:
+                self._gzipped[full_path] = (version, body, etag)
+                self._gzipped_bytes += len(body)
+                while self._gzipped_bytes > self.max_cache_bytes:
+                    _, (_, evicted, _) = self._gzipped.popitem(last=False)
+                    self._gzipped_bytes -= len(evicted)
+        return body, etag
+
+
+@lru_cache(maxsize=1)
 def get_static_dir() -> Optional[Path]:
-    """Locate the built frontend static files directory."""
+    """Locate the built frontend static files directory.
+
+    The result is cached for the process; call ``get_static_dir.cache_clear()``
+    after building the frontend in a running process.
+    """
     current_dir = Path(__file__).parent
-    
-    static_dir = current_dir / "static"
-    if static_dir.exists() and (static_dir / "index.html").exists():
-        return static_dir
-    
-    frontend_dist = current_dir / "frontend" / "dist"
-    if frontend_dist.exists() and (frontend_dist / "index.html").exists():
-        return frontend_dist
-    
+    with os.scandir(current_dir) as it:
+        subdirs = {entry.name for entry in it if entry.is_dir()}
+
+    if "static" in subdirs:
+        static_dir = current_dir / "static"
+        if os.path.isfile(static_dir / "index.html"):
+            return static_dir
+
+    if "frontend" in subdirs:
+        frontend_dist = current_dir / "frontend" / "dist"
+        if os.path.isfile(frontend_dist / "index.html"):
+            return frontend_dist
+
     return None
 
 
@@ -53,7 +140,7 @@ def mount_frontend(app: FastAPI, static_dir: Optional[Path] = None) -> bool:
 
     assets_dir = static_dir / "assets"
     if assets_dir.exists():
-        app.mount("/assets", StaticFiles(directory=str(assets_dir)), name="assets")
+        app.mount("/assets", CompressedStaticFiles(directory=str(assets_dir)), name="assets")
     
     @app.get("/")
     async def serve_index():
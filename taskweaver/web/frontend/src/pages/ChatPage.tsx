@@ -248,7 +248,7 @@ export function ChatPage() {
           if (msgIdx !== -1) {
             sessionMessages[msgIdx] = {
               ...sessionMessages[msgIdx],
-              text: sessionMessages[msgIdx].text + msg.text,
+              text: (msg.reset ? '' : sessionMessages[msgIdx].text) + msg.text,
               isStreaming: isReplaying ? false : !msg.is_end,
               isEnd: msg.is_end
             }
@@ -0,0 +1,105 @@
+"""Unit tests for the execution server routes."""
+
+import asyncio
+import os
+from typing import AsyncIterator, Iterator, List
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from starlette.requests import ClientDisconnect
+
+from taskweaver.ces.server.routes import router, upload_file_raw
+from taskweaver.ces.server.session_manager import ServerSession, ServerSessionManager
+
+
+class DisconnectingRequest:
+    """Request whose body stream is cut off after the given chunks."""
+
+    def __init__(self, chunks: List[bytes]) -> None:
+        self.chunks = chunks
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        for chunk in self.chunks:
+            yield chunk
+        raise ClientDisconnect()
+
+
+class TestUploadFileRaw:
+    """Tests for the streaming PUT upload endpoint."""
+
+    @pytest.fixture()
+    def manager(self, tmp_path: str) -> Iterator[ServerSessionManager]:
+        """Create a ServerSessionManager with a temp work dir and no kernel."""
+        with patch("taskweaver.ces.server.session_manager.Environment", MagicMock()):
+            yield ServerSessionManager(
+                env_id="test-env",
+                work_dir=str(tmp_path),
+            )
+
+    @pytest.fixture()
+    def session(self, manager: ServerSessionManager) -> ServerSession:
+        return manager.create_session("test-session")
+
+    @pytest.fixture()
+    def client(self, manager: ServerSessionManager) -> TestClient:
+        app = FastAPI()
+        app.include_router(router)
+        app.state.session_manager = manager
+        return TestClient(app)
+
+    def test_upload_is_written_to_session_cwd(self, client: TestClient, session: ServerSession) -> None:
+        """Test that the streamed body ends up in the session's working directory."""
+        content = os.urandom(256 * 1024)
+
+        resp = client.put("/api/v1/sessions/test-session/files/data.bin", content=content)
+
+        assert resp.status_code == 200
+        file_path = os.path.join(session.cwd, "data.bin")
+        assert resp.json() == {"filename": "data.bin", "status": "uploaded", "path": file_path}
+        with open(file_path, "rb") as f:
+            assert f.read() == content
+        # the temporary file has been moved into place
+        assert os.listdir(session.cwd) == ["data.bin"]
+
+    def test_upload_replaces_existing_file(self, client: TestClient, session: ServerSession) -> None:
+        """Test that uploading to an existing name overwrites it."""
+        client.put("/api/v1/sessions/test-session/files/data.csv", content=b"old,content\n")
+
+        resp = client.put("/api/v1/sessions/test-session/files/data.csv", content=b"new\n")
+
+        assert resp.status_code == 200
+        with open(os.path.join(session.cwd, "data.csv"), "rb") as f:
+            assert f.read() == b"new\n"
+
+    def test_upload_to_unknown_session(self, client: TestClient) -> None:
+        """Test that uploading to a missing session returns 404."""
+        resp = client.put("/api/v1/sessions/nonexistent/files/data.csv", content=b"data")
+
+        assert resp.status_code == 404
+
+    def test_client_disconnect_leaves_no_file(
+        self,
+        manager: ServerSessionManager,
+        session: ServerSession,
+    ) -> None:
+        """Test that an interrupted upload keeps the previous file and leaves no partial one."""
+        file_path = os.path.join(session.cwd, "data.csv")
+        with open(file_path, "wb") as f:
+            f.write(b"previous")
+
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(
+                upload_file_raw(
+                    session_id="test-session",
+                    filename="data.csv",
+                    request=DisconnectingRequest([b"partial"]),
+                    session_manager=manager,
+                ),
+            )
+
+        assert exc_info.value.status_code == 400
+        assert os.listdir(session.cwd) == ["data.csv"]
+        with open(file_path, "rb") as f:
+            assert f.read() == b"previous"
@@ -569,6 +569,26 @@ class TestServerSessionManagerUploadFile:
         # Verify file is in session's cwd, not in /etc
         assert session.cwd in result
 
+    @patch("taskweaver.ces.server.session_manager.Environment")
+    def test_get_upload_path(
+        self,
+        mock_env_class: MagicMock,
+        manager: ServerSessionManager,
+    ) -> None:
+        """Test that the upload path is sanitized and nothing is written."""
+        mock_env = MagicMock()
+        mock_env_class.return_value = mock_env
+
+        session = manager.create_session("test-session")
+
+        result = manager.get_upload_path("test-session", "../nested/data.csv")
+
+        assert result == os.path.join(session.cwd, "data.csv")
+        assert not os.path.exists(result)
+
+        with pytest.raises(KeyError, match="not found"):
+            manager.get_upload_path("nonexistent", "data.csv")
+
     @patch("taskweaver.ces.server.session_manager.Environment")
     def test_upload_file_with_subdirectory_in_name(
         self,
@@ -3,6 +3,10 @@ from typing import Any, Dict, Optional, cast
 
 import pytest
 
+_HERE = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(_HERE, "..", "..", "project/taskweaver_config.json")
+EXPERIENCE_DIR = os.path.join(_HERE, "data/experience")
+
 
 @pytest.fixture()
 def app_injector(request: pytest.FixtureRequest):
@@ -41,3 +45,41 @@ def app_injector(request: pytest.FixtureRequest):
     )
     app_injector.binder.bind(AppConfigSource, to=app_config)
     return app_injector
+
+
+def create_experience_manager(extra_config: Optional[Dict[str, Any]] = None):
+    """Create an ExperienceGenerator reading the test experiences, before they are loaded."""
+    from injector import Injector
+
+    from taskweaver.config.config_mgt import AppConfigSource
+    from taskweaver.logging import LoggingModule
+    from taskweaver.memory.experience import ExperienceGenerator
+
+    app_injector = Injector([LoggingModule])
+    app_config = AppConfigSource(
+        config_file_path=CONFIG_PATH,
+        config={
+            "llm.api_type": "openai",
+            "llm.api_key": "test_key",
+            "llm.model": "gpt-4",
+            **(extra_config or {}),
+        },
+    )
+    app_injector.binder.bind(AppConfigSource, to=app_config)
+    experience_manager = app_injector.create_object(ExperienceGenerator)
+    experience_manager.set_experience_dir(EXPERIENCE_DIR)
+    return experience_manager
+
+
+@pytest.fixture()
+def experience_manager_factory():
+    return create_experience_manager
+
+
+@pytest.fixture(scope="session")
+def loaded_experience_manager():
+    """An ExperienceGenerator with the test experiences loaded, built once per session."""
+    experience_manager = create_experience_manager()
+    experience_manager.refresh()
+    experience_manager.load_experience()
+    return experience_manager
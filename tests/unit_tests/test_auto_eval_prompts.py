@@ -0,0 +1,48 @@
+import importlib.util
+import os
+
+import pytest
+
+# auto_eval is a script folder, not a package, so the module is loaded from its path
+_PROMPTS_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "auto_eval", "prompts.py")
+_spec = importlib.util.spec_from_file_location("auto_eval_prompts", _PROMPTS_PATH)
+prompts = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(prompts)
+
+VALUES = {
+    "task_description": "Count the rows in {data}.csv",
+    "agent_response": "There are 42 rows.",
+    "agent_posts": "Planner -> CodeInterpreter: count the rows",
+}
+
+
+@pytest.mark.parametrize(
+    "template, render",
+    [
+        (prompts.NEEDS_RESPONSE_PROMPT, prompts.NEEDS_RESPONSE_RENDER),
+        (prompts.TESTER_FOLLOW_UP_PROMPT, prompts.TESTER_FOLLOW_UP_RENDER),
+        (prompts.JUDGE_PROMPT, prompts.JUDGE_RENDER),
+        (prompts.TASK_COMPLETION_CHECK_PROMPT, prompts.TASK_COMPLETION_CHECK_RENDER),
+    ],
+)
+def test_render_matches_format(template: str, render):
+    # str.format ignores unused keyword arguments, and so does the renderer
+    assert render(**VALUES) == template.format(**VALUES)
+
+
+def test_judge_prompt_braces_are_unescaped():
+    # the judge prompt used to be sent verbatim, with the escaped braces
+    rendered = prompts.JUDGE_RENDER()
+
+    assert rendered == prompts.JUDGE_PROMPT.format()
+    assert "{{" not in rendered and "}}" not in rendered
+    assert '{\n    "reason"' in rendered
+    assert rendered != prompts.JUDGE_PROMPT
+
+
+@pytest.mark.parametrize(
+    "template",
+    ["value: {x!r}", "value: [{x:>6}]", "value: {x[0]}", "value: {x.__class__.__name__}"],
+)
+def test_non_plain_fields_fall_back_to_format(template: str):
+    assert prompts._compile(template)(x="ab") == template.format(x="ab")
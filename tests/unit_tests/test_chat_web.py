@@ -0,0 +1,138 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from taskweaver.chat.web.app import create_app
+from taskweaver.chat.web.routes import chat_manager, router
+
+SESSION_ID = "session-1"
+
+
+class TrackingStream(httpx.AsyncByteStream):
+    """Upstream response body that records whether it was closed."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    async def aclose(self):
+        self.closed = True
+
+
+@pytest.fixture()
+def chat_session(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    session = SimpleNamespace(tw_session=SimpleNamespace(execution_cwd=str(tmp_path)))
+    monkeypatch.setattr(chat_manager, "get_session", lambda session_id: session)
+    monkeypatch.setattr(chat_manager, "_server_url", "http://ces")
+    return session
+
+
+def create_client(handler=None) -> TestClient:
+    app = FastAPI()
+    app.include_router(router)
+    if handler is not None:
+        app.state.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return TestClient(app)
+
+
+def test_artifact_is_streamed_from_ces(chat_session):
+    stream = TrackingStream([b"hello ", b"world"])
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        return httpx.Response(
+            200,
+            headers={
+                "content-type": "text/plain",
+                "content-disposition": 'attachment; filename="out.txt"',
+                "etag": '"abc"',
+                "x-internal": "secret",
+            },
+            stream=stream,
+        )
+
+    resp = create_client(handler).get(f"/api/v1/chat/sessions/{SESSION_ID}/artifacts/out.txt")
+
+    assert resp.status_code == 200
+    assert resp.content == b"hello world"
+    assert requested == [f"http://ces/api/v1/sessions/{SESSION_ID}/artifacts/out.txt"]
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert resp.headers["content-disposition"] == 'attachment; filename="out.txt"'
+    assert resp.headers["etag"] == '"abc"'
+    assert resp.headers["cache-control"] == "public, max-age=3600"
+    assert "x-internal" not in resp.headers
+    # the upstream response is closed once the body has been sent
+    assert stream.closed
+
+
+@pytest.mark.parametrize("status_code", [404, 500])
+def test_artifact_error_closes_upstream(chat_session, status_code: int):
+    stream = TrackingStream([b"error"])
+
+    resp = create_client(lambda request: httpx.Response(status_code, stream=stream)).get(
+        f"/api/v1/chat/sessions/{SESSION_ID}/artifacts/out.txt",
+    )
+
+    assert resp.status_code == status_code
+    assert stream.closed
+
+
+def test_artifact_falls_back_to_local_file(chat_session, tmp_path):
+    (tmp_path / "out.txt").write_bytes(b"local")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    resp = create_client(handler).get(f"/api/v1/chat/sessions/{SESSION_ID}/artifacts/out.txt")
+
+    assert resp.status_code == 200
+    assert resp.content == b"local"
+
+
+def test_artifact_without_shared_client(chat_session, tmp_path, monkeypatch: pytest.MonkeyPatch):
+    (tmp_path / "out.txt").write_bytes(b"local")
+    # nothing listens on this port, so the per-request client cannot connect
+    monkeypatch.setattr(chat_manager, "_server_url", "http://127.0.0.1:1")
+
+    resp = create_client().get(f"/api/v1/chat/sessions/{SESSION_ID}/artifacts/out.txt")
+
+    assert resp.status_code == 200
+    assert resp.content == b"local"
+
+
+def test_shared_client_lifecycle(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(chat_manager, "cleanup_all", lambda: None)
+    app = create_app(serve_frontend=False, ces_pool_size=4)
+
+    with TestClient(app):
+        client = app.state.http_client
+        assert isinstance(client, httpx.AsyncClient)
+        assert not client.is_closed
+    assert client.is_closed
+
+
+def test_ces_pool_size_from_env(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("TASKWEAVER_CES_POOL_SIZE", "8")
+    assert create_app(serve_frontend=False).state.ces_pool_size == 8
+    # an explicit size takes precedence over the environment
+    assert create_app(serve_frontend=False, ces_pool_size=2).state.ces_pool_size == 2
+
+
+@pytest.mark.parametrize("env_value", ["abc", "0", "-4"])
+def test_invalid_ces_pool_size_env_uses_default(monkeypatch: pytest.MonkeyPatch, env_value: str):
+    monkeypatch.setenv("TASKWEAVER_CES_POOL_SIZE", env_value)
+    assert create_app(serve_frontend=False).state.ces_pool_size == 64
+
+
+@pytest.mark.parametrize("pool_size", [0, -1])
+def test_invalid_ces_pool_size_is_rejected(pool_size: int):
+    with pytest.raises(ValueError, match="at least 1"):
+        create_app(serve_frontend=False, ces_pool_size=pool_size)
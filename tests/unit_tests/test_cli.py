@@ -94,6 +94,26 @@ class TestTaskWeaverCommand:
         result = cli_runner.invoke(taskweaver, ["--version"])
         assert result.exit_code == 0
 
+    def test_taskweaver_import_is_lightweight(self):
+        """Test that importing the CLI entrypoint does not pull in heavy modules."""
+        import subprocess
+        import sys
+
+        heavy_modules = ["fastapi", "uvicorn", "injector", "pydantic", "openai", "taskweaver.app.app"]
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys; import taskweaver.cli.cli; "
+                f"print([m for m in {heavy_modules!r} if m in sys.modules])",
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        )
+        assert result.stdout.strip() == "[]"
+
     def test_taskweaver_global_server_url_option(
         self,
         cli_runner: CliRunner,
@@ -125,6 +145,26 @@ class TestTaskWeaverCommand:
         )
         assert result.exit_code == 0
 
+    def test_taskweaver_caches_valid_workspace(
+        self,
+        cli_runner: CliRunner,
+        temp_workspace: str,
+        empty_workspace: str,
+    ):
+        """Test that a valid workspace is discovered once, an empty one every time."""
+        from unittest.mock import patch
+
+        from taskweaver.utils import app_utils
+
+        with patch.object(app_utils, "discover_app_dir", wraps=app_utils.discover_app_dir) as discover:
+            for _ in range(2):
+                cli_runner.invoke(taskweaver, ["-p", temp_workspace, "chat", "--help"])
+            assert discover.call_count == 1
+
+            for _ in range(2):
+                cli_runner.invoke(taskweaver, ["-p", empty_workspace, "chat", "--help"])
+            assert discover.call_count == 3
+
 
 class TestServerCommand:
     """Test server subcommand."""
@@ -387,6 +387,65 @@ def test_compose_prompt_with_plugin_only():
     assert messages[2]["content"] == "The iphone 15 pro is on sale."
 
 
+def test_compose_prompt_with_plugin_only_cache_markers():
+    app_injector = Injector(
+        [PluginModule, LoggingModule],
+    )
+    app_config = AppConfigSource(
+        config={
+            "app_dir": os.path.dirname(os.path.abspath(__file__)),
+            "llm.api_key": "test_key",  # pragma: allowlist secret
+            "code_generator.prompt_compression": False,
+            "code_generator.prompt_cache_markers": True,
+            "code_generator.prompt_file_path": os.path.join(
+                os.path.dirname(os.path.abspath(__file__)),
+                "data/prompts/generator_plugin_only.yaml",
+            ),
+            "plugin.base_path": os.path.join(
+                os.path.dirname(os.path.abspath(__file__)),
+                "data/plugins",
+            ),
+        },
+    )
+    app_injector.binder.bind(AppConfigSource, to=app_config)
+
+    from taskweaver.code_interpreter.code_interpreter_plugin_only import CodeGeneratorPluginOnly
+    from taskweaver.memory import Memory, Post, Round
+
+    code_generator = app_injector.get(CodeGeneratorPluginOnly)
+    code_generator.set_alias("CodeInterpreter")
+
+    round1 = Round.create(user_query="find iphones on sale", id="round-1")
+    round1.add_post(
+        Post.create(
+            message="find iphones on sale",
+            send_from="Planner",
+            send_to="CodeInterpreter",
+            attachment_list=[],
+        ),
+    )
+    memory = Memory(session_id="session-1")
+    memory.conversation.add_round(round1)
+
+    prompt_with_tools = code_generator._compose_prompt(
+        system_instructions=code_generator.system_instructions,
+        rounds=memory.conversation.rounds,
+    )
+    messages = prompt_with_tools["prompt"]
+    functions = prompt_with_tools["tools"]
+    assert messages[0]["content"] == [
+        {
+            "type": "text",
+            "text": code_generator.system_instructions,
+            "cache_control": {"type": "ephemeral"},
+        },
+    ]
+    assert messages[1]["content"] == "find iphones on sale"
+    assert functions[-1]["cache_control"] == {"type": "ephemeral"}
+    # the precomputed schemas must stay free of per-prompt markers
+    assert "cache_control" not in code_generator.plugin_functions[-1]
+
+
 def test_compose_prompt_with_not_plugin_only():
     app_injector = Injector(
         [PluginModule, LoggingModule],
@@ -687,3 +746,259 @@ def test_compose_with_shared_plan():
         "- ProgramApe must try to directly import required modules without installing "
         "them, and only install the modules if the execution fails. \n"
     )
+
+
+class StreamingLLM:
+    """A fake LLMApi that streams a fixed list of chunks."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.calls = 0
+
+    def chat_completion_stream(self, messages, **kwargs):
+        self.calls += 1
+        yield from self.chunks
+
+
+def create_plugin_only_generator(extra_config=None):
+    from taskweaver.code_interpreter.code_interpreter_plugin_only import CodeGeneratorPluginOnly
+
+    app_injector = Injector(
+        [PluginModule, LoggingModule],
+    )
+    app_config = AppConfigSource(
+        config={
+            "app_dir": os.path.dirname(os.path.abspath(__file__)),
+            "llm.api_key": "test_key",  # pragma: allowlist secret
+            "code_generator.prompt_compression": False,
+            "code_generator.prompt_file_path": os.path.join(
+                os.path.dirname(os.path.abspath(__file__)),
+                "data/prompts/generator_plugin_only.yaml",
+            ),
+            "plugin.base_path": os.path.join(
+                os.path.dirname(os.path.abspath(__file__)),
+                "data/plugins",
+            ),
+            **(extra_config or {}),
+        },
+    )
+    app_injector.binder.bind(AppConfigSource, to=app_config)
+
+    code_generator = app_injector.get(CodeGeneratorPluginOnly)
+    code_generator.set_alias("CodeInterpreter")
+    return code_generator
+
+
+def create_plugin_only_memory(queries):
+    from taskweaver.memory import Memory, Post, Round
+
+    memory = Memory(session_id="session-1")
+    for i, query in enumerate(queries):
+        round = Round.create(user_query=query, id=f"round-{i}")
+        round.add_post(
+            Post.create(
+                message=query,
+                send_from="Planner",
+                send_to="CodeInterpreter",
+                attachment_list=[],
+            ),
+        )
+        memory.conversation.add_round(round)
+    return memory
+
+
+def reply_with_plugin_only_generator(code_generator, memory, handler=None):
+    from taskweaver.module.event_emitter import SessionEventEmitter
+
+    event_emitter = SessionEventEmitter()
+    if handler is not None:
+        event_emitter.register(handler)
+    event_emitter.start_round(memory.conversation.rounds[-1].id)
+    post_proxy = event_emitter.create_post_proxy("CodeInterpreter")
+    post = code_generator.reply(memory, post_proxy=post_proxy)
+    return post, post_proxy
+
+
+def test_plugin_only_reply_streams_assistant_message():
+    from taskweaver.llm import format_chat_message
+
+    code_generator = create_plugin_only_generator()
+    code_generator.llm_api = StreamingLLM(
+        [
+            format_chat_message("assistant", "I can't "),
+            format_chat_message("assistant", ""),
+            format_chat_message("assistant", "do that"),
+        ],
+    )
+
+    post, post_proxy = reply_with_plugin_only_generator(
+        code_generator,
+        create_plugin_only_memory(["book a flight"]),
+    )
+
+    assert post.message == "I can't do that"
+    assert post.send_to == "Planner"
+    assert post_proxy.message_is_end
+    assert post.get_attachment(type=AttachmentType.function) == []
+
+
+def test_plugin_only_reply_streams_function_call():
+    import json
+
+    from taskweaver.llm import format_chat_message
+    from taskweaver.module.event_emitter import PostEventType, SessionEventHandler
+
+    functions = [{"name": "klarna_search", "arguments": {"query": "iphone"}}]
+    code_generator = create_plugin_only_generator()
+    code_generator.llm_api = StreamingLLM(
+        [
+            format_chat_message("assistant", "Let me search "),
+            format_chat_message("assistant", "for it."),
+            format_chat_message("function", json.dumps(functions)),
+        ],
+    )
+
+    message_updates = []
+
+    class MessageUpdateHandler(SessionEventHandler):
+        def handle(self, event):
+            if event.t == PostEventType.post_message_update:
+                message_updates.append((event.msg, event.extra))
+
+    post, post_proxy = reply_with_plugin_only_generator(
+        code_generator,
+        create_plugin_only_memory(["find iphones on sale"]),
+        handler=MessageUpdateHandler(),
+    )
+
+    # the text streamed before the tool call must not reach the Planner
+    assert post.message == ""
+    assert not post_proxy.message_is_end
+    # and the event consumers are told to drop it as well
+    assert message_updates == [
+        ("Let me search ", {"is_end": False}),
+        ("for it.", {"is_end": False}),
+        ("", {"is_end": False, "reset": True}),
+    ]
+    attachments = post.get_attachment(type=AttachmentType.function)
+    assert len(attachments) == 1
+    assert json.loads(attachments[0].content) == functions
+
+
+def test_plugin_only_response_cache():
+    import json
+
+    from taskweaver.llm import format_chat_message
+
+    functions = [{"name": "klarna_search", "arguments": {"query": "iphone"}}]
+    code_generator = create_plugin_only_generator(
+        {
+            "code_generator.response_cache_enabled": True,
+            "code_generator.response_cache_size": 2,
+        },
+    )
+    llm = StreamingLLM([format_chat_message("function", json.dumps(functions))])
+    code_generator.llm_api = llm
+
+    def reply(query):
+        post, _ = reply_with_plugin_only_generator(code_generator, create_plugin_only_memory([query]))
+        return post
+
+    first = reply("query a")
+    assert llm.calls == 1
+
+    # an identical prompt is answered from the cache, including function calls
+    cached = reply("query a")
+    assert llm.calls == 1
+    assert json.loads(cached.get_attachment(type=AttachmentType.function)[0].content) == functions
+    assert cached.id != first.id
+
+    reply("query b")
+    assert llm.calls == 2
+    # "query a" was used more recently than "query b" and survives the eviction
+    reply("query a")
+    reply("query c")
+    assert llm.calls == 3
+    assert len(code_generator.response_cache) == 2
+
+    reply("query b")
+    assert llm.calls == 4
+
+
+def test_plugin_only_response_cache_disabled():
+    from taskweaver.llm import format_chat_message
+
+    code_generator = create_plugin_only_generator()
+    llm = StreamingLLM([format_chat_message("assistant", "I can't do that")])
+    code_generator.llm_api = llm
+
+    for _ in range(2):
+        reply_with_plugin_only_generator(code_generator, create_plugin_only_memory(["query a"]))
+    assert llm.calls == 2
+    assert len(code_generator.response_cache) == 0
+
+
+class WordEncoding:
+    """Tokenizer stand-in that counts words and records what it encodes."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, text):
+        self.encoded.append(text)
+        return text.split()
+
+    def encode_batch(self, texts):
+        return [self.encode(text) for text in texts]
+
+
+def test_plugin_only_rounds_tokens_are_counted_incrementally(monkeypatch):
+    from taskweaver.memory import Post
+    from taskweaver.module import tracing
+
+    encoding = WordEncoding()
+    monkeypatch.setattr(tracing, "_enc", encoding)
+
+    code_generator = create_plugin_only_generator()
+    memory = create_plugin_only_memory(["find iphones on sale", "compare their prices"])
+    rounds = memory.conversation.rounds
+    rounds[0].add_post(
+        Post.create(
+            message="The iphone 15 pro is on sale.",
+            send_from="CodeInterpreter",
+            send_to="Planner",
+            attachment_list=[],
+        ),
+    )
+    # posts between other roles are not part of the prompt
+    rounds[0].add_post(
+        Post.create(
+            message="not in the prompt",
+            send_from="Planner",
+            send_to="User",
+            attachment_list=[],
+        ),
+    )
+
+    encoding.encoded.clear()
+
+    def full_count(rounds):
+        return sum(
+            len(post.message.split())
+            for _round in rounds
+            for post in _round.post_list
+            if code_generator._is_prompt_post(post)
+        )
+
+    assert code_generator._count_rounds_tokens(rounds[:1]) == full_count(rounds[:1]) == 11
+    assert encoding.encoded == ["find iphones on sale", "The iphone 15 pro is on sale."]
+
+    encoding.encoded.clear()
+    assert code_generator._count_rounds_tokens(rounds) == full_count(rounds) == 14
+    # only the post added since the last turn is tokenized
+    assert encoding.encoded == ["compare their prices"]
+
+    # rounds dropped from the prompt, e.g., after compaction, are no longer counted
+    encoding.encoded.clear()
+    assert code_generator._count_rounds_tokens(rounds[1:]) == full_count(rounds[1:]) == 3
+    assert encoding.encoded == []
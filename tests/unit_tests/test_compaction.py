@@ -1,8 +1,9 @@
 import threading
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List
-from unittest.mock import MagicMock
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from taskweaver.memory.compaction import CompactedMessage, CompactorConfig, ContextCompactor
 
@@ -20,15 +21,57 @@ class MockRound:
     post_list: List[MockPost]
 
 
+class FakeLLM:
+    """Lightweight stand-in for LLMApi that records chat_completion calls."""
+
+    def __init__(self, response: Optional[Dict[str, Any]] = None, side_effect: Any = None):
+        self.response = response
+        self.side_effect = side_effect
+        self.calls: List[Tuple[Any, Any]] = []
+
+    def chat_completion(self, *args: Any, **kwargs: Any) -> Optional[Dict[str, Any]]:
+        self.calls.append((args, kwargs))
+        if isinstance(self.side_effect, BaseException):
+            raise self.side_effect
+        if self.side_effect is not None:
+            return self.side_effect(*args, **kwargs)
+        return self.response
+
+
+class CountingLogger:
+    """Logger that counts messages containing each of the watched keywords."""
+
+    KEYWORDS = ("failed",)
+
+    def __init__(self):
+        self.logs: List[str] = []
+        self.counts: Counter = Counter()
+
+    def __call__(self, msg: str) -> None:
+        self.logs.append(msg)
+        lowered = msg.lower()
+        self.counts.update(keyword for keyword in self.KEYWORDS if keyword in lowered)
+
+
 def create_mock_rounds(n: int) -> List[MockRound]:
-    rounds = []
-    for i in range(n):
-        posts = [
-            MockPost("User", "Planner", f"Query {i + 1}"),
-            MockPost("Planner", "User", f"Response {i + 1}"),
-        ]
-        rounds.append(MockRound(user_query=f"Question {i + 1}", post_list=posts))
-    return rounds
+    return [
+        MockRound(
+            user_query=f"Question {i}",
+            post_list=[MockPost("User", "Planner", f"Query {i}"), MockPost("Planner", "User", f"Response {i}")],
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def wait_until(predicate: Callable[[], Any], timeout: float = 1.0, interval: float = 0.005) -> Any:
+    start = time.time()
+    while True:
+        result = predicate()
+        if result:
+            return result
+        if time.time() - start > timeout:
+            raise TimeoutError(f"Condition not met within {timeout}s")
+        time.sleep(interval)
 
 
 class TestCompactedMessage:
@@ -59,7 +102,7 @@ class TestContextCompactorInit:
         config = CompactorConfig()
         compactor = ContextCompactor(
             config=config,
-            llm_api=MagicMock(),
+            llm_api=FakeLLM(),
             rounds_getter=lambda: [],
         )
         assert compactor.get_compaction() is None
@@ -70,7 +113,7 @@ class TestContextCompactorInit:
         config = CompactorConfig()
         compactor = ContextCompactor(
             config=config,
-            llm_api=MagicMock(),
+            llm_api=FakeLLM(),
             rounds_getter=lambda: [],
             logger=lambda msg: logs.append(msg),
         )
@@ -83,7 +126,7 @@ class TestContextCompactorStart:
         config = CompactorConfig(enabled=True)
         compactor = ContextCompactor(
             config=config,
-            llm_api=MagicMock(),
+            llm_api=FakeLLM(),
             rounds_getter=lambda: [],
         )
 
@@ -97,7 +140,7 @@ class TestContextCompactorStart:
         config = CompactorConfig(enabled=True)
         compactor = ContextCompactor(
             config=config,
-            llm_api=MagicMock(),
+            llm_api=FakeLLM(),
             rounds_getter=lambda: [],
         )
 
@@ -113,7 +156,7 @@ class TestContextCompactorStart:
         config = CompactorConfig(enabled=False)
         compactor = ContextCompactor(
             config=config,
-            llm_api=MagicMock(),
+            llm_api=FakeLLM(),
             rounds_getter=lambda: [],
         )
 
@@ -126,8 +169,7 @@ class TestContextCompactorCompaction:
         rounds = create_mock_rounds(5)
         config = CompactorConfig(threshold=3, retain_recent=1, enabled=True)
 
-        mock_llm = MagicMock()
-        mock_llm.chat_completion.return_value = {"content": "Test summary"}
+        mock_llm = FakeLLM(response={"content": "Test summary"})
 
         compactor = ContextCompactor(
             config=config,
@@ -137,10 +179,8 @@ class TestContextCompactorCompaction:
 
         compactor.start()
         compactor.notify_rounds_changed()
-        time.sleep(0.2)
 
-        result = compactor.get_compaction()
-        assert result is not None
+        result = wait_until(compactor.get_compaction)
         assert result.start_index == 1
         assert result.end_index == 4
         assert result.summary == "Test summary"
@@ -151,8 +191,7 @@ class TestContextCompactorCompaction:
         rounds = create_mock_rounds(5)
         config = CompactorConfig(threshold=3, retain_recent=1, enabled=True)
 
-        mock_llm = MagicMock()
-        mock_llm.chat_completion.return_value = {"content": "First summary"}
+        mock_llm = FakeLLM(response={"content": "First summary"})
 
         compactor = ContextCompactor(
             config=config,
@@ -162,17 +201,17 @@ class TestContextCompactorCompaction:
 
         compactor.start()
         compactor.notify_rounds_changed()
-        time.sleep(0.2)
 
+        assert compactor._done_event.wait(1.0)
+        compactor._done_event.clear()
         first_result = compactor.get_compaction()
         assert first_result.end_index == 4
 
         rounds.extend(create_mock_rounds(5))
-        mock_llm.chat_completion.return_value = {"content": "Second summary"}
+        mock_llm.response = {"content": "Second summary"}
 
         compactor.notify_rounds_changed()
-        time.sleep(0.2)
-
+        assert compactor._done_event.wait(1.0)
         second_result = compactor.get_compaction()
         assert second_result.end_index == 9
         assert second_result.summary == "Second summary"
@@ -183,7 +222,7 @@ class TestContextCompactorCompaction:
         rounds = create_mock_rounds(5)
         config = CompactorConfig(threshold=10, retain_recent=2, enabled=True)
 
-        mock_llm = MagicMock()
+        mock_llm = FakeLLM()
 
         compactor = ContextCompactor(
             config=config,
@@ -193,10 +232,10 @@ class TestContextCompactorCompaction:
 
         compactor.start()
         compactor.notify_rounds_changed()
-        time.sleep(0.2)
+        assert compactor._done_event.wait(1.0)
 
         assert compactor.get_compaction() is None
-        mock_llm.chat_completion.assert_not_called()
+        assert mock_llm.calls == []
 
         compactor.stop()
 
@@ -204,8 +243,7 @@ class TestContextCompactorCompaction:
         rounds = create_mock_rounds(10)
         config = CompactorConfig(threshold=10, retain_recent=2, enabled=True)
 
-        mock_llm = MagicMock()
-        mock_llm.chat_completion.return_value = {"content": "Summary"}
+        mock_llm = FakeLLM(response={"content": "Summary"})
 
         compactor = ContextCompactor(
             config=config,
@@ -215,10 +253,8 @@ class TestContextCompactorCompaction:
 
         compactor.start()
         compactor.notify_rounds_changed()
-        time.sleep(0.2)
 
-        result = compactor.get_compaction()
-        assert result is not None
+        result = wait_until(compactor.get_compaction)
         assert result.end_index == 8
 
         compactor.stop()
@@ -227,23 +263,21 @@ class TestContextCompactorCompaction:
         rounds = create_mock_rounds(10)
         config = CompactorConfig(threshold=5, retain_recent=2, enabled=True)
 
-        mock_llm = MagicMock()
-        mock_llm.chat_completion.side_effect = Exception("LLM error")
+        mock_llm = FakeLLM(side_effect=Exception("LLM error"))
 
-        logs = []
+        logger = CountingLogger()
         compactor = ContextCompactor(
             config=config,
             llm_api=mock_llm,
             rounds_getter=lambda: rounds,
-            logger=lambda msg: logs.append(msg),
+            logger=logger,
         )
 
         compactor.start()
         compactor.notify_rounds_changed()
-        time.sleep(0.2)
 
+        wait_until(lambda: logger.counts["failed"])
         assert compactor.get_compaction() is None
-        assert any("failed" in log.lower() for log in logs)
 
         compactor.stop()
 
@@ -251,23 +285,21 @@ class TestContextCompactorCompaction:
         rounds = create_mock_rounds(10)
         config = CompactorConfig(threshold=5, retain_recent=2, enabled=True)
 
-        mock_llm = MagicMock()
-        mock_llm.chat_completion.return_value = {"content": ""}
+        mock_llm = FakeLLM(response={"content": ""})
 
-        logs = []
+        logger = CountingLogger()
         compactor = ContextCompactor(
             config=config,
             llm_api=mock_llm,
             rounds_getter=lambda: rounds,
-            logger=lambda msg: logs.append(msg),
+            logger=logger,
         )
 
         compactor.start()
         compactor.notify_rounds_changed()
-        time.sleep(0.2)
 
+        wait_until(lambda: logger.counts["failed"])
         assert compactor.get_compaction() is None
-        assert any("failed" in log.lower() for log in logs)
 
         compactor.stop()
 
@@ -275,7 +307,7 @@ class TestContextCompactorCompaction:
         rounds = create_mock_rounds(20)
         config = CompactorConfig(threshold=5, enabled=False)
 
-        mock_llm = MagicMock()
+        mock_llm = FakeLLM()
 
         compactor = ContextCompactor(
             config=config,
@@ -285,10 +317,11 @@ class TestContextCompactorCompaction:
 
         compactor.start()
         compactor.notify_rounds_changed()
-        time.sleep(0.1)
 
+        # no worker is started when disabled, so there is nothing to wait for
+        assert compactor._worker is None
         assert compactor.get_compaction() is None
-        mock_llm.chat_completion.assert_not_called()
+        assert mock_llm.calls == []
 
 
 class TestContextCompactorMultipleNotifications:
@@ -296,15 +329,15 @@ class TestContextCompactorMultipleNotifications:
         rounds_list = [create_mock_rounds(10)]
         config = CompactorConfig(threshold=3, retain_recent=1, enabled=True)
 
-        call_count = [0]
-        mock_llm = MagicMock()
+        started = threading.Event()
+        release = threading.Event()
 
-        def counting_llm(*args, **kwargs):
-            call_count[0] += 1
-            time.sleep(0.1)
-            return {"content": f"Summary {call_count[0]}"}
+        def gated_llm(*args, **kwargs):
+            started.set()
+            release.wait(timeout=2)
+            return {"content": "Summary"}
 
-        mock_llm.chat_completion.side_effect = counting_llm
+        mock_llm = FakeLLM(side_effect=gated_llm)
 
         compactor = ContextCompactor(
             config=config,
@@ -314,15 +347,15 @@ class TestContextCompactorMultipleNotifications:
 
         compactor.start()
         compactor.notify_rounds_changed()
-        time.sleep(0.05)
+        assert started.wait(1.0)
 
+        # notified while the first summary is in flight
         rounds_list[0] = create_mock_rounds(20)
         compactor.notify_rounds_changed()
+        release.set()
 
-        time.sleep(0.5)
-
-        assert call_count[0] >= 1
-        assert compactor.get_compaction() is not None
+        wait_until(lambda: compactor.get_compaction() and compactor.get_compaction().end_index == 19)
+        assert len(mock_llm.calls) == 2
 
         compactor.stop()
 
@@ -330,8 +363,7 @@ class TestContextCompactorMultipleNotifications:
 class TestContextCompactorThreadSafety:
     def test_get_compaction_thread_safe(self):
         config = CompactorConfig(threshold=3, retain_recent=1, enabled=True)
-        mock_llm = MagicMock()
-        mock_llm.chat_completion.return_value = {"content": "Summary"}
+        mock_llm = FakeLLM(response={"content": "Summary"})
 
         compactor = ContextCompactor(
             config=config,
@@ -341,26 +373,50 @@ class TestContextCompactorThreadSafety:
 
         compactor.start()
         compactor.notify_rounds_changed()
-        time.sleep(0.2)
+        wait_until(compactor.get_compaction)
 
-        results = []
-        errors = []
+        # any exception raised by a reader is re-raised when collecting results
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            results = list(executor.map(lambda _: compactor.get_compaction(), range(500)))
 
-        def reader():
-            for _ in range(100):
-                try:
-                    results.append(compactor.get_compaction())
-                except Exception as e:
-                    errors.append(e)
+        assert all(result is not None for result in results)
+        compactor.stop()
 
-        threads = [threading.Thread(target=reader) for _ in range(5)]
-        for t in threads:
-            t.start()
-        for t in threads:
-            t.join()
 
-        assert len(errors) == 0
-        compactor.stop()
+class TestContextCompactorConcurrency:
+    def test_concurrent_compactors_overlap_llm_calls(self):
+        num_compactors = 8
+        # every LLM call waits until all of them are in flight, so the calls only
+        # return if the compactors summarize concurrently
+        all_in_flight = threading.Barrier(num_compactors)
+
+        def blocking_llm(*args, **kwargs):
+            all_in_flight.wait(timeout=2.0)
+            return {"content": "Summary"}
+
+        config = CompactorConfig(threshold=3, retain_recent=1, enabled=True)
+        compactors = [
+            ContextCompactor(
+                config=config,
+                llm_api=FakeLLM(side_effect=blocking_llm),
+                rounds_getter=lambda: create_mock_rounds(10),
+            )
+            for _ in range(num_compactors)
+        ]
+        for compactor in compactors:
+            compactor.start()
+
+        for compactor in compactors:
+            compactor.notify_rounds_changed()
+        for compactor in compactors:
+            assert compactor._done_event.wait(5.0)
+
+        # a call made alone would have broken the barrier and failed the compaction
+        assert not all_in_flight.broken
+        assert all(compactor.get_compaction() is not None for compactor in compactors)
+
+        for compactor in compactors:
+            compactor.stop()
 
 
 class TestContextCompactorStop:
@@ -368,7 +424,7 @@ class TestContextCompactorStop:
         config = CompactorConfig(enabled=True)
         compactor = ContextCompactor(
             config=config,
-            llm_api=MagicMock(),
+            llm_api=FakeLLM(),
             rounds_getter=lambda: [],
         )
 
@@ -377,30 +433,39 @@ class TestContextCompactorStop:
         assert worker.is_alive()
 
         compactor.stop()
-        time.sleep(0.1)
+        worker.join(timeout=1.0)
+        assert not worker.is_alive()
         assert compactor._worker is None
 
     def test_stop_during_compaction(self):
         rounds = create_mock_rounds(10)
         config = CompactorConfig(threshold=3, retain_recent=1, enabled=True)
 
-        mock_llm = MagicMock()
+        started = threading.Event()
+        release = threading.Event()
 
-        def slow_llm(*args, **kwargs):
-            time.sleep(1)
+        def gated_llm(*args, **kwargs):
+            started.set()
+            release.wait(timeout=2)
             return {"content": "Summary"}
 
-        mock_llm.chat_completion.side_effect = slow_llm
-
         compactor = ContextCompactor(
             config=config,
-            llm_api=mock_llm,
+            llm_api=FakeLLM(side_effect=gated_llm),
             rounds_getter=lambda: rounds,
         )
 
         compactor.start()
         compactor.notify_rounds_changed()
-        time.sleep(0.1)
+        assert started.wait(1.0)
 
-        compactor.stop()
+        # stop() waits for the in-flight summary, so call it from another thread
+        worker = compactor._worker
+        stopper = threading.Thread(target=compactor.stop)
+        stopper.start()
+        wait_until(compactor._shutdown.is_set)
+        release.set()
+        stopper.join(timeout=1.0)
+
+        assert not worker.is_alive()
         assert compactor._worker is None
@@ -0,0 +1,227 @@
+import gc
+import os
+import pickle
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import List
+
+import numpy as np
+import pytest
+
+from taskweaver.ext_role.document_retriever.document_retriever import DocumentRetriever, _BatchedSearcher, _LoadedIndex
+
+
+class FakeIndex:
+    """Index returning `10 * query + rank` as the neighbor ids, blocking the first search until released."""
+
+    def __init__(self, block_first: bool = False):
+        self.batch_sizes = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        if not block_first:
+            self.release.set()
+
+    def search(self, vectors: np.ndarray, k: int):
+        self.batch_sizes.append(vectors.shape[0])
+        self.entered.set()
+        self.release.wait()
+        if (vectors < 0).any():
+            raise ValueError("invalid query")
+        indices = (vectors[:, :1] * 10).astype(np.int64) + np.arange(k)
+        return indices.astype(np.float32), indices
+
+
+def wait_for_queue_size(searcher: _BatchedSearcher, size: int, timeout: float = 1.0):
+    start = time.time()
+    while searcher.queue.qsize() < size:
+        if time.time() - start > timeout:
+            raise TimeoutError(f"Queue did not reach {size} items within {timeout}s")
+        time.sleep(0.005)
+
+
+def test_concurrent_queries_are_coalesced():
+    index = FakeIndex(block_first=True)
+    searcher = _BatchedSearcher(index)
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        first = pool.submit(searcher.search, np.array([[1.0]]), 2)
+        assert index.entered.wait(timeout=1.0)
+        # these arrive while the first search is running
+        second = pool.submit(searcher.search, np.array([[2.0]]), 1)
+        third = pool.submit(searcher.search, np.array([[3.0]]), 3)
+        wait_for_queue_size(searcher, 2)
+        index.release.set()
+
+        _, first_indices = first.result(timeout=1.0)
+        _, second_indices = second.result(timeout=1.0)
+        _, third_indices = third.result(timeout=1.0)
+
+    assert index.batch_sizes == [1, 2]
+    assert first_indices.tolist() == [[10, 11]]
+    # each caller only gets its own rows, cut to its own k
+    assert second_indices.tolist() == [[20]]
+    assert third_indices.tolist() == [[30, 31, 32]]
+
+
+def test_search_error_is_raised_to_the_caller():
+    index = FakeIndex()
+    searcher = _BatchedSearcher(index)
+
+    with pytest.raises(ValueError):
+        searcher.search(np.array([[-1.0]]), 1, timeout=1.0)
+
+    # the worker keeps serving after a failure
+    _, indices = searcher.search(np.array([[4.0]]), 1, timeout=1.0)
+    assert indices.tolist() == [[40]]
+
+
+def test_search_times_out():
+    index = FakeIndex(block_first=True)
+    searcher = _BatchedSearcher(index)
+
+    with pytest.raises(TimeoutError):
+        searcher.search(np.array([[1.0]]), 1, timeout=0.05)
+    index.release.set()
+
+
+def test_worker_stops_with_its_searcher():
+    before = set(threading.enumerate())
+    searcher = _BatchedSearcher(FakeIndex())
+    (worker,) = set(threading.enumerate()) - before
+
+    del searcher
+    gc.collect()
+
+    worker.join(timeout=1.0)
+    assert not worker.is_alive()
+
+
+class WordEncoding:
+    """Stand-in for the tiktoken encoding, one token per word."""
+
+    def encode_ordinary(self, text: str) -> List[str]:
+        return text.split()
+
+    def encode_ordinary_batch(self, texts: List[str]) -> List[List[str]]:
+        return [text.split() for text in texts]
+
+    def decode(self, tokens: List[str]) -> str:
+        return " ".join(tokens)
+
+
+def write_index_folder(folder, texts: List[str]):
+    (folder / "index.faiss").write_bytes(b"")
+    docstore = [{"text": text, "metadata": {"source": "doc.md", "chunk_id": i}} for i, text in enumerate(texts)]
+    with open(folder / "index.pkl", "wb") as f:
+        pickle.dump(docstore, f)
+    with open(folder / "chunk_id_to_index.pkl", "wb") as f:
+        pickle.dump({f"doc.md_{i}": i for i in range(len(texts))}, f)
+
+
+@pytest.fixture()
+def fake_faiss(monkeypatch: pytest.MonkeyPatch):
+    loaded = []
+
+    def read_index(path: str):
+        loaded.append(path)
+        return FakeIndex()
+
+    ivf = SimpleNamespace(nprobe=0)
+    monkeypatch.setitem(
+        sys.modules,
+        "faiss",
+        SimpleNamespace(
+            read_index=read_index,
+            omp_set_num_threads=lambda n: None,
+            extract_index_ivf=lambda index: ivf,
+        ),
+    )
+    monkeypatch.setattr(_LoadedIndex, "_instances", {})
+    return loaded
+
+
+def test_index_is_shared_per_settings(tmp_path, fake_faiss):
+    write_index_folder(tmp_path, ["first chunk", "second chunk here"])
+    folder = str(tmp_path)
+
+    loaded = _LoadedIndex.get(folder, nprobe=16, num_threads=0, enc=WordEncoding())
+    assert _LoadedIndex.get(folder, nprobe=16, num_threads=0, enc=WordEncoding()) is loaded
+    assert _LoadedIndex.get(folder, nprobe=32, num_threads=0, enc=WordEncoding()) is not loaded
+    assert _LoadedIndex.get(folder, nprobe=16, num_threads=2, enc=WordEncoding()) is not loaded
+    assert len(fake_faiss) == 3
+
+    assert loaded.chunk_id_to_index == {("doc.md", 0): 0, ("doc.md", 1): 1}
+    assert loaded.token_counts.tolist() == [2, 3]
+
+
+def test_index_is_reloaded_when_rebuilt(tmp_path, fake_faiss):
+    write_index_folder(tmp_path, ["first chunk"])
+    folder = str(tmp_path)
+    loaded = _LoadedIndex.get(folder, nprobe=16, num_threads=0, enc=WordEncoding())
+
+    write_index_folder(tmp_path, ["rebuilt first chunk", "rebuilt second chunk"])
+    # make sure the rebuild is seen even on file systems with coarse timestamps
+    for name in ["index.faiss", "index.pkl", "chunk_id_to_index.pkl"]:
+        os.utime(tmp_path / name, ns=(0, loaded.file_stamp[0] + 1))
+
+    reloaded = _LoadedIndex.get(folder, nprobe=16, num_threads=0, enc=WordEncoding())
+    assert reloaded is not loaded
+    assert len(fake_faiss) == 2
+    # the index and the docstore are always replaced together
+    assert reloaded.searcher is not loaded.searcher
+    assert [entry["text"] for entry in reloaded.docstore] == ["rebuilt first chunk", "rebuilt second chunk"]
+    assert reloaded.token_counts.tolist() == [3, 3]
+
+
+@pytest.fixture()
+def retriever():
+    docstore = [
+        {"text": text, "metadata": {"source": source, "chunk_id": chunk_id}}
+        for source, chunk_id, text in [
+            ("doc.md", 0, "a0 a1 a2"),
+            ("doc.md", 1, "b0 b1 b2"),
+            ("doc.md", 2, "c0 c1"),
+            ("doc.md", 3, "d0 d1 d2"),
+            ("single.md", 0, "only chunk"),
+        ]
+    ]
+    # the role is not configured, only the state used by the expansion is set
+    retriever = DocumentRetriever.__new__(DocumentRetriever)
+    retriever.enc = WordEncoding()
+    retriever.docstore = docstore
+    retriever.chunk_id_to_index = {
+        (entry["metadata"]["source"], entry["metadata"]["chunk_id"]): idx for idx, entry in enumerate(docstore)
+    }
+    retriever.token_counts = _LoadedIndex._count_docstore_tokens(docstore, retriever.enc)
+    return retriever
+
+
+def expand(retriever: DocumentRetriever, idx: int, target_length: int) -> str:
+    (expanded,) = retriever.do_expand([retriever.docstore[idx]], target_length)
+    assert expanded["metadata"] == retriever.docstore[idx]["metadata"]
+    return expanded["chunk"]
+
+
+def test_expand_trims_left_neighbor(retriever):
+    # the left neighbor does not fit, so its last tokens go before the chunk
+    assert expand(retriever, 2, target_length=4) == "b1 b2 c0 c1"
+
+
+def test_expand_trims_right_neighbor(retriever):
+    # the left neighbor fits in full, the right one is cut to the remaining token
+    assert expand(retriever, 1, target_length=7) == "a0 a1 a2 b0 b1 b2 c0"
+
+
+def test_expand_chunk_already_at_target_length(retriever):
+    assert expand(retriever, 1, target_length=3) == "b0 b1 b2"
+
+
+def test_expand_chunk_without_neighbors(retriever):
+    assert expand(retriever, 4, target_length=100) == "only chunk"
+
+
+def test_expand_merges_neighbors_in_order(retriever):
+    assert expand(retriever, 2, target_length=100) == "a0 a1 a2 b0 b1 b2 c0 c1 d0 d1 d2"
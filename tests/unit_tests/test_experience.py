@@ -2,44 +2,24 @@ import json
 import os
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
-from injector import Injector
 
-from taskweaver.config.config_mgt import AppConfigSource
-from taskweaver.logging import LoggingModule
 from taskweaver.memory.experience import ExperienceGenerator
 
 IN_GITHUB_ACTIONS = os.getenv("GITHUB_ACTIONS") == "true"
 
 
-def test_experience_loading():
-    """Test that handcrafted experiences can be loaded."""
-    app_injector = Injector([LoggingModule])
-    app_config = AppConfigSource(
-        config_file_path=os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            "..",
-            "..",
-            "project/taskweaver_config.json",
-        ),
-        config={
-            "llm.api_type": "openai",
-            "llm.api_key": "test_key",
-            "llm.model": "gpt-4",
-        },
-    )
-    app_injector.binder.bind(AppConfigSource, to=app_config)
-    experience_manager = app_injector.create_object(ExperienceGenerator)
-    experience_manager.set_experience_dir(
-        os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            "data/experience",
-        ),
-    )
+@pytest.fixture()
+def experience_manager(loaded_experience_manager, monkeypatch):
+    """The session-wide manager with an empty selection cache and a fresh LLM mock."""
+    loaded_experience_manager.selection_cache.clear()
+    monkeypatch.setattr(loaded_experience_manager.llm_api, "chat_completion", MagicMock())
+    return loaded_experience_manager
 
-    experience_manager.refresh()
-    experience_manager.load_experience()
 
+def test_experience_loading(experience_manager):
+    """Test that handcrafted experiences can be loaded."""
     assert len(experience_manager.experience_list) == 1
     exp = experience_manager.experience_list[0]
     assert exp.exp_id == "test-exp-1"
@@ -50,120 +30,88 @@ def test_experience_loading():
     assert "Best Practices" in exp.what or "os.path.exists" in exp.what
 
 
-@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Test doesn't work in Github Actions.")
-def test_experience_retrieval_with_llm():
-    """Test LLM-based experience retrieval with mocked LLM response."""
-    app_injector = Injector([LoggingModule])
-    app_config = AppConfigSource(
-        config_file_path=os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            "..",
-            "..",
-            "project/taskweaver_config.json",
-        ),
-        config={
-            "llm.api_type": "openai",
-            "llm.api_key": "test_key",
-            "llm.model": "gpt-4",
-        },
-    )
-    app_injector.binder.bind(AppConfigSource, to=app_config)
-    experience_manager = app_injector.create_object(ExperienceGenerator)
-    experience_manager.set_experience_dir(
-        os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            "data/experience",
-        ),
-    )
+def test_experience_reload_skipped_when_unchanged(experience_manager):
+    """Test that unchanged experience files are not read again."""
+    with patch("taskweaver.memory.experience.read_yaml") as read_yaml:
+        experience_manager.load_experience()
+        read_yaml.assert_not_called()
 
-    user_query = "show top 10 data in ./data.csv"
+        read_yaml.return_value = {"exp_id": "test-exp-1", "who": ["CodeInterpreter"], "when": "", "what": ""}
+        experience_manager.invalidate_cache()
+        experience_manager.load_experience()
+        read_yaml.assert_called_once()
+    assert len(experience_manager.experience_list) == 1
 
-    experience_manager.refresh()
-    experience_manager.load_experience()
 
-    # Mock LLM response to select the test experience (object format for json_object response_format)
-    mock_llm_response = {"content": json.dumps({"test-exp-1": True})}
-    experience_manager.llm_api.chat_completion = MagicMock(return_value=mock_llm_response)
-
-    # CodeInterpreter should see it (matches who)
-    experiences = experience_manager.retrieve_experience(user_query=user_query, role="CodeInterpreter")
-
-    assert len(experiences) == 1
-    assert experiences[0].exp_id == "test-exp-1"
-    assert len(experiences[0].when) > 0
-    assert len(experiences[0].what) > 0
-
-
-def test_experience_who_filtering():
-    """Test that experiences are filtered by role."""
-    app_injector = Injector([LoggingModule])
-    app_config = AppConfigSource(
-        config_file_path=os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            "..",
-            "..",
-            "project/taskweaver_config.json",
-        ),
-        config={
-            "llm.api_type": "openai",
-            "llm.api_key": "test_key",
-            "llm.model": "gpt-4",
-        },
-    )
-    app_injector.binder.bind(AppConfigSource, to=app_config)
-    experience_manager = app_injector.create_object(ExperienceGenerator)
-    experience_manager.set_experience_dir(
-        os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            "data/experience",
+@pytest.mark.parametrize(
+    "user_query, role, llm_selection, expected_ids",
+    [
+        # CodeInterpreter sees test-exp-1 (matches who) and the LLM selects it
+        pytest.param(
+            "show top 10 data in ./data.csv",
+            "CodeInterpreter",
+            {"test-exp-1": True},
+            ["test-exp-1"],
+            id="retrieval_with_llm",
+            marks=pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Test doesn't work in Github Actions."),
         ),
-    )
+        # Planner has no candidates (test-exp-1 targets CodeInterpreter only)
+        pytest.param("show data", "Planner", {"test-exp-1": True}, [], id="who_filtering"),
+        # the LLM selects no experiences
+        pytest.param("completely unrelated query about weather", None, {"test-exp-1": False}, [], id="no_selection"),
+    ],
+)
+def test_experience_retrieval(experience_manager, user_query, role, llm_selection, expected_ids):
+    """Test LLM-based experience retrieval with mocked LLM responses."""
+    # object format for json_object response_format
+    experience_manager.llm_api.chat_completion.return_value = {"content": json.dumps(llm_selection)}
+
+    experiences = experience_manager.retrieve_experience(user_query=user_query, role=role)
+
+    assert [exp.exp_id for exp in experiences] == expected_ids
+    for exp in experiences:
+        assert len(exp.when) > 0
+        assert len(exp.what) > 0
+
+
+def test_experience_selection_cache(experience_manager):
+    """Test that an identical selection request is served from the cache."""
+    mock_llm_response = {"content": json.dumps({"test-exp-1": True})}
+    experience_manager.llm_api.chat_completion.return_value = mock_llm_response
 
-    experience_manager.refresh()
-    experience_manager.load_experience()
+    for _ in range(2):
+        experiences = experience_manager.retrieve_experience(user_query="show data", role="CodeInterpreter")
+        assert [exp.exp_id for exp in experiences] == ["test-exp-1"]
+    assert experience_manager.llm_api.chat_completion.call_count == 1
 
-    # Planner should see 0 candidates (test-exp-1 targets CodeInterpreter only)
-    experiences = experience_manager.retrieve_experience(
+    # a different conversation context changes the prompt, so it is not a hit
+    experience_manager.retrieve_experience(
         user_query="show data",
-        role="Planner",
-    )
-    assert len(experiences) == 0
-
-
-def test_experience_retrieval_no_selection():
-    """Test LLM-based retrieval when LLM selects no experiences."""
-    app_injector = Injector([LoggingModule])
-    app_config = AppConfigSource(
-        config_file_path=os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            "..",
-            "..",
-            "project/taskweaver_config.json",
-        ),
-        config={
-            "llm.api_type": "openai",
-            "llm.api_key": "test_key",
-            "llm.model": "gpt-4",
-        },
-    )
-    app_injector.binder.bind(AppConfigSource, to=app_config)
-    experience_manager = app_injector.create_object(ExperienceGenerator)
-    experience_manager.set_experience_dir(
-        os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            "data/experience",
-        ),
+        role="CodeInterpreter",
+        conversation_context="User: load data.csv",
     )
+    assert experience_manager.llm_api.chat_completion.call_count == 2
+
 
-    user_query = "completely unrelated query about weather"
+def test_experience_selection_by_embedding(experience_manager_factory):
+    """Test that similar experiences are selected without calling the LLM."""
+    experience_manager = experience_manager_factory({"experience.selection_method": "embedding"})
 
-    experience_manager.refresh()
-    experience_manager.load_experience()
+    # embed the "when" section on one axis and the queries on the given axis
+    def encode_texts(texts):
+        return [[0.0, 1.0] if text == "unrelated" else [1.0, 0.0] for text in texts]
 
-    # Mock LLM response to select no experiences (object format)
-    mock_llm_response = {"content": json.dumps({"test-exp-1": False})}
-    experience_manager.llm_api.chat_completion = MagicMock(return_value=mock_llm_response)
+    with patch.object(ExperienceGenerator, "_encode_texts", side_effect=lambda texts: np.array(encode_texts(texts))):
+        experience_manager.load_experience()
+        experience_manager.llm_api.chat_completion = MagicMock(
+            return_value={"content": json.dumps({"test-exp-1": False})},
+        )
 
-    experiences = experience_manager.retrieve_experience(user_query=user_query)
+        experiences = experience_manager.retrieve_experience(user_query="show data", role="CodeInterpreter")
+        assert [exp.exp_id for exp in experiences] == ["test-exp-1"]
+        experience_manager.llm_api.chat_completion.assert_not_called()
 
-    assert len(experiences) == 0
+        # below the threshold the LLM decides
+        experiences = experience_manager.retrieve_experience(user_query="unrelated", role="CodeInterpreter")
+        assert len(experiences) == 0
+        experience_manager.llm_api.chat_completion.assert_called_once()
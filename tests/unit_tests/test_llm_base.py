@@ -80,3 +80,111 @@ def test_llm_output_format(
         recv_msg += chunk["content"]
 
     assert recv_msg == chat_response["content"]
+
+
+class FakeCompletionService:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def chat_completion(self, messages, *args, **kwargs):
+        yield from self.chunks
+
+
+@pytest.mark.app_config(
+    {
+        "llm.use_mock": True,
+        "llm.mock.mode": "fixed",
+    },
+)
+def test_chat_completion_function_replaces_streamed_text(app_injector: Injector):
+    api = app_injector.get(LLMApi)
+    api.completion_service = FakeCompletionService(
+        [
+            format_chat_message("assistant", "Let me "),
+            format_chat_message("assistant", "check."),
+            format_chat_message("function", '[{"name": "f", '),
+            format_chat_message("function", '"arguments": {}}]'),
+        ],
+    )
+
+    msg = api.chat_completion([format_chat_message("user", "Hi")])
+
+    assert msg["role"] == "function"
+    assert json.loads(msg["content"]) == [{"name": "f", "arguments": {}}]
+
+
+def create_tool_call_delta(index, name=None, arguments=None):
+    from types import SimpleNamespace
+
+    return SimpleNamespace(
+        index=index,
+        function=SimpleNamespace(name=name, arguments=arguments),
+    )
+
+
+def create_stream_chunk(content=None, role=None, tool_calls=None):
+    from types import SimpleNamespace
+
+    return SimpleNamespace(
+        choices=[
+            SimpleNamespace(
+                delta=SimpleNamespace(role=role, content=content, tool_calls=tool_calls),
+            ),
+        ],
+    )
+
+
+@pytest.mark.app_config(
+    {
+        "llm.api_type": "openai",
+        "llm.model": "gpt-4",
+    },
+)
+def test_openai_stream_aggregates_tool_call_fragments(app_injector: Injector):
+    from types import SimpleNamespace
+
+    pytest.importorskip("openai")
+    from taskweaver.llm.openai import OpenAIService
+
+    stream = [
+        create_stream_chunk(role="assistant", content="Searching."),
+        create_stream_chunk(
+            tool_calls=[create_tool_call_delta(0, name="klarna_", arguments="")],
+        ),
+        create_stream_chunk(
+            tool_calls=[create_tool_call_delta(0, name="search", arguments='{"query": ')],
+        ),
+        # a second call interleaved with the first one
+        create_stream_chunk(
+            tool_calls=[create_tool_call_delta(1, name="get_time", arguments="")],
+        ),
+        create_stream_chunk(
+            tool_calls=[
+                create_tool_call_delta(0, arguments='"iphone"}'),
+                create_tool_call_delta(1),
+            ],
+        ),
+        SimpleNamespace(choices=[]),
+    ]
+    service = app_injector.get(OpenAIService)
+    service._client = SimpleNamespace(
+        chat=SimpleNamespace(
+            completions=SimpleNamespace(create=lambda **kwargs: iter(stream)),
+        ),
+    )
+
+    chunks = list(
+        service.chat_completion(
+            [format_chat_message("user", "find iphones")],
+            stream=True,
+            tools=[],
+            tool_choice="auto",
+        ),
+    )
+
+    assert [c["role"] for c in chunks] == ["assistant"] * 5 + ["function"]
+    assert "".join(c["content"] for c in chunks[:-1]) == "Searching."
+    assert json.loads(chunks[-1]["content"]) == [
+        {"name": "klarna_search", "arguments": {"query": "iphone"}},
+        {"name": "get_time", "arguments": {}},
+    ]
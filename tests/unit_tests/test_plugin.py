@@ -112,3 +112,26 @@ def test_plugin_format_prompt():
         "# description: This is a string describing the anomaly detection results.\n"
         "str]:...\n"
     )
+
+
+def test_plugin_only_list():
+    app_injector = Injector(
+        [PluginModule, LoggingModule],
+    )
+    app_config = AppConfigSource(
+        config={
+            "plugin.base_path": os.path.join(os.path.dirname(os.path.abspath(__file__)), "data/plugins"),
+        },
+    )
+    app_injector.binder.bind(AppConfigSource, to=app_config)
+
+    plugin_registry = app_injector.get(PluginRegistry)
+
+    plugin_only = plugin_registry.get_plugin_only_list()
+    assert [p.name for p in plugin_only] == ["klarna_search"]
+    assert [p.name for p in plugin_only] == [p.name for p in plugin_registry.get_list() if p.plugin_only]
+
+    # the filtered list is rebuilt when the registry is reloaded
+    reloaded = plugin_registry.get_plugin_only_list(force_reload=True)
+    assert [p.name for p in reloaded] == ["klarna_search"]
+    assert reloaded[0] is not plugin_only[0]
@@ -87,3 +87,68 @@ def test_tracing_enabled():
     import time
 
     time.sleep(5)
+
+
+class WordEncoding:
+    """Tokenizer stand-in with one token per word."""
+
+    def encode(self, text):
+        return text.split()
+
+    def encode_batch(self, texts):
+        return [text.split() for text in texts]
+
+
+def test_token_counting_disabled(monkeypatch: pytest.MonkeyPatch):
+    from taskweaver.llm import format_chat_message
+    from taskweaver.module import tracing
+    from taskweaver.module.tracing import Tracing
+
+    # as left by a Tracing created with tracing disabled
+    monkeypatch.setattr(tracing, "_enc", None)
+    monkeypatch.setattr(tracing, "_trace", None)
+
+    assert Tracing.count_tokens("one two three") == 0
+    assert Tracing.count_tokens_batch(["one two", "three"]) == [0, 0]
+    assert Tracing.count_prompt_tokens([format_chat_message("user", "one two")]) == 0
+    assert not Tracing.is_recording_prompt()
+
+
+def test_token_counting(monkeypatch: pytest.MonkeyPatch):
+    from taskweaver.llm import format_chat_message
+    from taskweaver.module import tracing
+    from taskweaver.module.tracing import Tracing
+
+    monkeypatch.setattr(tracing, "_enc", WordEncoding())
+
+    assert Tracing.count_tokens_batch(["one two", "", "three four five"]) == [2, 0, 3]
+    assert Tracing.count_tokens_batch([]) == []
+
+    messages = [
+        format_chat_message("system", "you are helpful", cache_control=True),
+        format_chat_message("user", "describe this image", image_urls=["data:image/png;base64,AAAA"]),
+        format_chat_message("assistant", '{"response": "a cat"}'),
+    ]
+    # only the text is counted, not the JSON structure of the messages or images
+    assert Tracing.count_prompt_tokens(messages) == 3 + 3 + 3
+    assert Tracing.count_prompt_tokens(messages) == sum(
+        Tracing.count_tokens_batch(["you are helpful", "describe this image", '{"response": "a cat"}']),
+    )
+
+
+@pytest.mark.parametrize(
+    "trace, record_prompt, expected",
+    [
+        (None, True, False),
+        (object(), False, False),
+        (object(), True, True),
+    ],
+)
+def test_is_recording_prompt(monkeypatch: pytest.MonkeyPatch, trace, record_prompt: bool, expected: bool):
+    from taskweaver.module import tracing
+    from taskweaver.module.tracing import Tracing
+
+    monkeypatch.setattr(tracing, "_trace", trace)
+    monkeypatch.setattr(tracing, "_record_prompt", record_prompt)
+
+    assert Tracing.is_recording_prompt() is expected
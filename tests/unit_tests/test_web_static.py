@@ -0,0 +1,108 @@
+import gzip
+from typing import Tuple
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from taskweaver.web import CompressedStaticFiles
+
+SCRIPT = b"console.log('hello');\n" * 200
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+@pytest.fixture()
+def assets_dir(tmp_path):
+    (tmp_path / "index-abc123.js").write_bytes(SCRIPT)
+    (tmp_path / "style-def456.css").write_bytes(b"body { margin: 0; }\n" * 100)
+    (tmp_path / "logo-789.png").write_bytes(b"\x89PNG\r\n\x1a\n" + bytes(256))
+    return tmp_path
+
+
+def create_client(assets_dir, **kwargs) -> Tuple[TestClient, CompressedStaticFiles]:
+    app = FastAPI()
+    static_files = CompressedStaticFiles(directory=str(assets_dir), **kwargs)
+    app.mount("/assets", static_files, name="assets")
+    return TestClient(app), static_files
+
+
+def test_text_asset_is_gzipped_when_accepted(assets_dir):
+    client, _ = create_client(assets_dir)
+
+    resp = client.get("/assets/index-abc123.js", headers={"Accept-Encoding": "gzip"})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["cache-control"] == IMMUTABLE
+    assert resp.headers["vary"] == "Accept-Encoding"
+    assert resp.headers["etag"].endswith('-gz"')
+    assert int(resp.headers["content-length"]) == len(gzip.compress(SCRIPT, mtime=0))
+    # the test client decodes the body
+    assert resp.content == SCRIPT
+
+
+def test_text_asset_is_sent_plain_without_gzip(assets_dir):
+    client, _ = create_client(assets_dir)
+
+    resp = client.get("/assets/index-abc123.js", headers={"Accept-Encoding": "identity"})
+
+    assert resp.status_code == 200
+    assert "content-encoding" not in resp.headers
+    assert resp.headers["cache-control"] == IMMUTABLE
+    assert resp.headers["vary"] == "Accept-Encoding"
+    assert resp.content == SCRIPT
+
+
+def test_binary_asset_is_not_gzipped(assets_dir):
+    client, _ = create_client(assets_dir)
+
+    resp = client.get("/assets/logo-789.png", headers={"Accept-Encoding": "gzip"})
+
+    assert resp.status_code == 200
+    assert "content-encoding" not in resp.headers
+    assert "vary" not in resp.headers
+    assert resp.headers["cache-control"] == IMMUTABLE
+
+
+def test_matching_etag_returns_not_modified(assets_dir):
+    client, _ = create_client(assets_dir)
+    etag = client.get("/assets/index-abc123.js", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+
+    resp = client.get(
+        "/assets/index-abc123.js",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": etag},
+    )
+
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["etag"] == etag
+    assert resp.headers["cache-control"] == IMMUTABLE
+
+
+def test_missing_asset_is_not_cached_long_term(assets_dir):
+    client, _ = create_client(assets_dir)
+
+    resp = client.get("/assets/missing.js", headers={"Accept-Encoding": "gzip"})
+
+    assert resp.status_code == 404
+    assert resp.headers.get("cache-control") != IMMUTABLE
+
+
+def test_gzip_cache_is_bounded(assets_dir):
+    script_size = len(gzip.compress(SCRIPT, mtime=0))
+    client, static_files = create_client(assets_dir, max_cache_bytes=script_size)
+
+    client.get("/assets/index-abc123.js", headers={"Accept-Encoding": "gzip"})
+    assert list(static_files._gzipped) == [str(assets_dir / "index-abc123.js")]
+
+    # caching the stylesheet evicts the script to stay within the budget
+    resp = client.get("/assets/style-def456.css", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert list(static_files._gzipped) == [str(assets_dir / "style-def456.css")]
+    assert static_files._gzipped_bytes <= script_size
+
+    # a body larger than the budget is still served, just not cached
+    client, static_files = create_client(assets_dir, max_cache_bytes=16)
+    resp = client.get("/assets/index-abc123.js", headers={"Accept-Encoding": "gzip"})
+    assert resp.content == SCRIPT
+    assert len(static_files._gzipped) == 0